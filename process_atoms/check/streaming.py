@@ -0,0 +1,277 @@
+"""
+Streaming conformance checking of a fixed set of process atoms.
+
+Every open case keeps the state of the template automaton of every atom (see
+`process_atoms.mine.declare.automaton`). An event only steps the automata of its case,
+so the work per event is proportional to the number of atoms and independent of the
+size of the log seen so far.
+"""
+
+from dataclasses import dataclass
+from typing import Iterable
+
+import numpy as np
+
+from process_atoms.mine.declare.automaton import (
+    MATCH_A,
+    MATCH_B,
+    SYMBOLS,
+    compile_regex,
+)
+from process_atoms.mine.declare.enums.mp_constants import (
+    TraceState,
+    activation_based_on,
+)
+from process_atoms.mine.declare.regexchecker import (
+    instantiate_unary_regex,
+    regex_representations,
+)
+from process_atoms.models.processatom import ProcessAtom
+
+# Verdicts in the order of their codes in the verdict tables
+VERDICTS = (
+    TraceState.VIOLATED,
+    TraceState.POSSIBLY_VIOLATED,
+    TraceState.POSSIBLY_SATISFIED,
+    TraceState.SATISFIED,
+)
+_VIOLATED, _POSSIBLY_VIOLATED, _POSSIBLY_SATISFIED, _SATISFIED = range(len(VERDICTS))
+
+
+@dataclass
+class CaseVerdict:
+    case_id: str
+    atom: ProcessAtom
+    state: TraceState
+
+
+class StreamingChecker:
+    """
+    Check a stream of events against process atoms.
+
+    The events of a case have to arrive in order. Whenever an event changes the verdict
+    of an atom for its case, a `CaseVerdict` is emitted. While a case is open, the
+    verdicts are `POSSIBLY_SATISFIED` or `POSSIBLY_VIOLATED` unless the remaining events
+    of the case cannot change them anymore. `close_case` emits the final verdicts.
+
+    Args:
+        process (str): The process ID.
+        process_atoms (list[ProcessAtom]): The atoms to check. Only unary and binary
+            atoms are checked.
+        event_hierarchy (dict): Optional mapping from lower-level to higher-level
+            activities, as for `RegexChecker`.
+        consider_vacuity (bool): Whether cases that do not activate a binary atom
+            satisfy it.
+    """
+
+    def __init__(
+        self,
+        process: str,
+        process_atoms: list[ProcessAtom],
+        event_hierarchy: dict = None,
+        consider_vacuity: bool = True,
+        initial_capacity: int = 1024,
+    ):
+        self.process = process
+        self.atoms = [atom for atom in process_atoms if atom.arity in (1, 2)]
+        self.event_hierarchy = event_hierarchy
+        self.consider_vacuity = consider_vacuity
+
+        automata = []
+        activation_bits = np.zeros(len(self.atoms), dtype=np.uint8)
+        for i, atom in enumerate(self.atoms):
+            if atom.arity == 1:
+                regx = instantiate_unary_regex(
+                    atom.atom_type, "a", atom.cardinality, atom.cardinality
+                )
+                automata.append(compile_regex(regx))
+            else:
+                automata.append(compile_regex(regex_representations[atom.atom_type]))
+                for operand in activation_based_on[atom.atom_type]:
+                    activation_bits[i] |= MATCH_A if operand == 0 else MATCH_B
+        num_states = max((automaton.num_states for automaton in automata), default=1)
+        self._transitions = np.zeros(
+            (len(automata), num_states, len(SYMBOLS)), dtype=np.int32
+        )
+        # verdict of each state when the case goes on (open) and when it ends (closed)
+        self._open_verdicts = np.full((len(automata), num_states), _VIOLATED, np.int8)
+        self._closed_verdicts = np.full((len(automata), num_states), _VIOLATED, np.int8)
+        for i, automaton in enumerate(automata):
+            states = slice(0, automaton.num_states)
+            self._transitions[i, states] = automaton.transitions
+            self._open_verdicts[i, states] = np.select(
+                [
+                    automaton.accepting & automaton.always_accepts(),
+                    automaton.accepting,
+                    automaton.can_accept(),
+                ],
+                [_SATISFIED, _POSSIBLY_SATISFIED, _POSSIBLY_VIOLATED],
+                _VIOLATED,
+            )
+            self._closed_verdicts[i, states] = np.where(
+                automaton.accepting, _SATISFIED, _VIOLATED
+            )
+        self._transitions = self._transitions.reshape(-1)
+        self._state_base = np.arange(len(automata), dtype=np.int64) * num_states
+        self._activation_bits = activation_bits
+        # unary atoms and atoms without activation are always activated
+        self._always_activated = activation_bits == 0
+
+        self._symbols: dict[str, np.ndarray] = {}
+        self._rows: dict[str, int] = {}
+        self._free_rows: list[int] = []
+        self._states = np.zeros((initial_capacity, len(self.atoms)), dtype=np.int64)
+        self._activated = np.zeros((initial_capacity, len(self.atoms)), dtype=bool)
+        self._verdicts = np.zeros((initial_capacity, len(self.atoms)), dtype=np.int8)
+        self._initial_verdicts = self._verdict_codes(
+            np.zeros((1, len(self.atoms)), dtype=np.int64),
+            np.zeros((1, len(self.atoms)), dtype=bool),
+        )[0]
+
+    def __len__(self):
+        """Number of open cases."""
+        return len(self._rows)
+
+    def _renamed(self, activity: str, operands: list[str]) -> str:
+        # same sequential renaming as `RegexChecker._operand_ids`
+        if self.event_hierarchy is None:
+            return activity
+        for operand in operands:
+            for low, high in self.event_hierarchy.items():
+                if high == operand and activity == low:
+                    activity = operand
+        return activity
+
+    def _symbols_of(self, activity: str) -> np.ndarray:
+        """Return the symbol that `activity` is for the automaton of every atom."""
+        symbols = self._symbols.get(activity)
+        if symbols is None:
+            symbols = np.zeros(len(self.atoms), dtype=np.uint8)
+            for i, atom in enumerate(self.atoms):
+                renamed = self._renamed(activity, atom.operands)
+                if renamed == atom.operands[0]:
+                    symbols[i] |= MATCH_A
+                if atom.arity == 2 and renamed == atom.operands[1]:
+                    symbols[i] |= MATCH_B
+            self._symbols[activity] = symbols
+        return symbols
+
+    def _verdict_codes(self, states, activated, closed=False) -> np.ndarray:
+        verdict_table = self._closed_verdicts if closed else self._open_verdicts
+        verdicts = verdict_table.reshape(-1)[self._state_base + states]
+        if not self.consider_vacuity:
+            # a case that has not activated an atom yet violates it if it ends now
+            pending = ~(activated | self._always_activated)
+            if closed:
+                verdicts[pending] = _VIOLATED
+            else:
+                verdicts[pending] = np.minimum(verdicts[pending], _POSSIBLY_VIOLATED)
+        return verdicts
+
+    def _row(self, case_id: str) -> int:
+        row = self._rows.get(case_id)
+        if row is not None:
+            return row
+        if self._free_rows:
+            row = self._free_rows.pop()
+        else:
+            row = len(self._rows)
+            if row == len(self._states):
+                self._states = np.concatenate(
+                    [self._states, np.zeros_like(self._states)]
+                )
+                self._activated = np.concatenate(
+                    [self._activated, np.zeros_like(self._activated)]
+                )
+                self._verdicts = np.concatenate(
+                    [self._verdicts, np.zeros_like(self._verdicts)]
+                )
+        self._states[row] = 0
+        self._activated[row] = False
+        self._verdicts[row] = self._initial_verdicts
+        self._rows[case_id] = row
+        return row
+
+    def _changes(self, case_ids, rows, verdicts) -> list[CaseVerdict]:
+        changed = verdicts != self._verdicts[rows]
+        self._verdicts[rows] = verdicts
+        return [
+            CaseVerdict(
+                case_id=case_ids[i], atom=self.atoms[j], state=VERDICTS[verdicts[i, j]]
+            )
+            for i, j in zip(*np.nonzero(changed))
+        ]
+
+    def consume(self, case_id: str, activity: str) -> list[CaseVerdict]:
+        """
+        Consume a single event and return the verdicts that it changed.
+        """
+        return self.consume_batch([case_id], [activity])
+
+    def consume_batch(
+        self, case_ids: Iterable[str], activities: Iterable[str]
+    ) -> list[CaseVerdict]:
+        """
+        Consume a micro-batch of events, given as parallel sequences of case IDs and
+        activities in the order in which they occurred. Return the verdicts that changed,
+        each case in the order of its first event in the batch.
+        """
+        case_ids = list(case_ids)
+        if len(case_ids) == 0:
+            return []
+        rows = np.fromiter(
+            map(self._row, case_ids), dtype=np.int64, count=len(case_ids)
+        )
+        symbols = np.stack([self._symbols_of(activity) for activity in activities])
+
+        # The k-th events of all cases in the batch are processed together
+        order = np.argsort(rows, kind="stable")
+        sorted_rows = rows[order]
+        is_first = np.r_[True, sorted_rows[1:] != sorted_rows[:-1]]
+        group_starts = np.flatnonzero(is_first)
+        ranks = np.arange(len(rows)) - np.repeat(
+            group_starts, np.diff(np.r_[group_starts, len(rows)])
+        )
+        for k in range(ranks.max() + 1):
+            events = order[ranks == k]
+            step_rows = rows[events]
+            step_symbols = symbols[events].astype(np.int64)
+            states = self._states[step_rows]
+            self._states[step_rows] = self._transitions[
+                (self._state_base + states) * len(SYMBOLS) + step_symbols
+            ]
+            self._activated[step_rows] |= (step_symbols & self._activation_bits) > 0
+
+        first_events = np.sort(order[group_starts])
+        changed_rows = rows[first_events]
+        verdicts = self._verdict_codes(
+            self._states[changed_rows], self._activated[changed_rows]
+        )
+        return self._changes(
+            [case_ids[i] for i in first_events], changed_rows, verdicts
+        )
+
+    def verdicts(self, case_id: str) -> dict[str, TraceState]:
+        """
+        Return the current verdict of every atom, by atom ID, for an open case.
+        """
+        row = self._rows[case_id]
+        return {
+            atom.id: VERDICTS[code]
+            for atom, code in zip(self.atoms, self._verdicts[row])
+        }
+
+    def close_case(self, case_id: str) -> list[CaseVerdict]:
+        """
+        Close a case and return the final verdicts that differ from its last ones. A
+        case that never received an event is closed as the empty trace.
+        """
+        row = self._row(case_id)
+        rows = np.array([row])
+        verdicts = self._verdict_codes(
+            self._states[rows], self._activated[rows], closed=True
+        )
+        changes = self._changes([case_id], rows, verdicts)
+        del self._rows[case_id]
+        self._free_rows.append(row)
+        return changes
@@ -0,0 +1,276 @@
+"""
+Chunked reading of event logs from CSV and XES files.
+
+The files are read in chunks of events. `EventLogBuilder` encodes every chunk right away
+into compact arrays: categorical columns such as the case IDs and activities become
+integer codes into dictionaries that grow with each chunk, timestamps become datetime64
+values and continuous columns floats. Only the first row of each case is kept for the
+case attributes. The memory needed is therefore bounded by one chunk of raw data plus
+the compact arrays, instead of a data frame of the complete file.
+"""
+
+from typing import Iterator
+from xml.etree.ElementTree import iterparse
+
+import numpy as np
+import pandas as pd
+
+from process_atoms.models.column_types import CaseID, Categorical, Continuous, Timestamp
+from process_atoms.models.event_log import EventLog, EventLogSchemaTypes
+
+# Value types of the XES attribute elements
+_XES_ATTRIBUTES = {
+    "string": str,
+    "id": str,
+    "date": str,
+    "int": int,
+    "float": float,
+    "boolean": lambda value: value.lower() == "true",
+}
+
+
+class _Dictionary:
+    """Integer codes of the distinct values of a column, assigned incrementally."""
+
+    def __init__(self):
+        self.ids: dict = {}
+        self.labels: list = []
+
+    def encode(self, values: pd.Series) -> np.ndarray:
+        """Return the codes of `values`, adding unseen values. Missing values get -1."""
+        codes, uniques = pd.factorize(values)
+        ids = np.empty(len(uniques), dtype=np.int32)
+        for i, value in enumerate(uniques):
+            code = self.ids.get(value)
+            if code is None:
+                code = self.ids[value] = len(self.labels)
+                self.labels.append(value)
+            ids[i] = code
+        return np.where(codes >= 0, ids[np.maximum(codes, 0)], -1).astype(np.int32)
+
+
+class EventLogBuilder:
+    """
+    Build an `EventLog` from chunks of case and event attributes.
+
+    Args:
+        schema (EventLogSchemaTypes): The schema of the log. The columns of type
+            `CaseID`, `EventType` and `Categorical` are encoded with dictionaries, the
+            ones of type `Timestamp` are parsed as datetimes and the ones of type
+            `Continuous` as floats. Other columns are kept as they are.
+        time_format (str): Optional format of the timestamps (see `pd.to_datetime`).
+        utc (bool): Whether to convert the timestamps to UTC, as needed for timestamps
+            with different UTC offsets.
+    """
+
+    def __init__(
+        self, schema: EventLogSchemaTypes, time_format: str = None, utc: bool = False
+    ):
+        self.schema = schema
+        self.time_format = time_format
+        self.utc = utc
+        self._case_frames: list[pd.DataFrame] = []
+        self._known_cases: set = set()
+        self._dictionaries = {
+            col: _Dictionary()
+            for (col, C) in schema.events.items()
+            if issubclass(C, (CaseID, Categorical))
+        }
+        self._chunks: dict[str, list[np.ndarray]] = {col: [] for col in schema.events}
+        self._time_zones: dict[str, str] = {}
+
+    def __len__(self):
+        """Number of events added so far."""
+        return sum(map(len, self._chunks[self.schema.get_event_column(CaseID)]))
+
+    def add_cases(self, cases: pd.DataFrame):
+        """
+        Add case attributes. Only the first row of each case ID is kept, so the case
+        attributes can be added along with every chunk of events.
+        """
+        case_ids = cases[self.schema.get_case_column(CaseID)]
+        new = ~case_ids.duplicated() & ~case_ids.isin(self._known_cases)
+        if new.any():
+            self._case_frames.append(cases[list(self.schema.cases)][new])
+            self._known_cases.update(case_ids[new])
+
+    def add_events(self, events: pd.DataFrame):
+        """Encode a chunk of events and add it to the log."""
+        for col, C in self.schema.events.items():
+            values = events[col]
+            if col in self._dictionaries:
+                array = self._dictionaries[col].encode(values)
+            elif issubclass(C, Timestamp):
+                array = self._parse_times(col, values)
+            elif issubclass(C, Continuous):
+                array = pd.to_numeric(values).to_numpy(dtype=np.float64)
+            else:
+                array = values.to_numpy()
+            self._chunks[col].append(array)
+
+    def _parse_times(self, col: str, values: pd.Series) -> np.ndarray:
+        times = pd.to_datetime(values, format=self.time_format, utc=self.utc)
+        time_zone = str(times.dt.tz) if times.dt.tz is not None else None
+        if self._time_zones.setdefault(col, time_zone) != time_zone:
+            raise ValueError(f"Timestamps of `{col}` in different time zones")
+        # `values` gives plain datetime64 values for time zone aware columns as well
+        return np.asarray(times.values)
+
+    def build(self) -> EventLog:
+        """Assemble the `EventLog` from the chunks added so far."""
+        columns = {}
+        for col, C in self.schema.events.items():
+            chunks = self._chunks[col]
+            array = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int32)
+            if col in self._dictionaries:
+                labels = pd.Index(self._dictionaries[col].labels, dtype=object)
+                if issubclass(C, CaseID):
+                    # `EventLog` expects the case IDs to be categorized in sorted order
+                    order = labels.argsort()
+                    ranks = np.empty(len(order), dtype=np.int32)
+                    ranks[order] = np.arange(len(order), dtype=np.int32)
+                    array = np.where(array >= 0, ranks[np.maximum(array, 0)], -1)
+                    labels = labels[order]
+                columns[col] = pd.Categorical.from_codes(array, labels)
+            elif issubclass(C, Timestamp):
+                times = pd.DatetimeIndex(array)
+                if self._time_zones.get(col) is not None:
+                    times = times.tz_localize("UTC").tz_convert(self._time_zones[col])
+                columns[col] = times
+            else:
+                columns[col] = array
+        events = pd.DataFrame(columns)
+        if self._case_frames:
+            cases = pd.concat(self._case_frames, ignore_index=True)
+        else:
+            cases = pd.DataFrame(columns=list(self.schema.cases))
+        return EventLog(cases, events, self.schema)
+
+
+def read_csv_event_log(
+    path: str,
+    schema: EventLogSchemaTypes,
+    chunksize: int = 1_000_000,
+    time_format: str = None,
+    utc: bool = False,
+    **kwargs,
+) -> EventLog:
+    """
+    Read an event log from a CSV file with one row per event in chunks of `chunksize`
+    rows. Case attributes are taken from the first row of each case.
+
+    Args:
+        path (str): The path of the CSV file.
+        schema (EventLogSchemaTypes): The schema of the log. Only its columns are read.
+        chunksize (int): The number of rows that are read at once.
+        time_format (str): Optional format of the timestamps (see `pd.to_datetime`).
+        utc (bool): Whether to convert the timestamps to UTC.
+        **kwargs: Further arguments of `pd.read_csv`, e.g. `sep` or `dtype`.
+
+    Returns:
+        EventLog: The event log.
+    """
+    columns = list(dict.fromkeys([*schema.cases, *schema.events]))
+    dtype = {
+        col: np.float64
+        for (col, C) in [*schema.cases.items(), *schema.events.items()]
+        if issubclass(C, Continuous)
+    }
+    dtype.update(kwargs.pop("dtype", {}))
+    builder = EventLogBuilder(schema, time_format=time_format, utc=utc)
+    with pd.read_csv(
+        path, usecols=columns, dtype=dtype, chunksize=chunksize, **kwargs
+    ) as reader:
+        for chunk in reader:
+            builder.add_cases(chunk)
+            builder.add_events(chunk)
+    return builder.build()
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _iter_xes_traces(path: str) -> Iterator[tuple[dict, list[dict]]]:
+    """
+    Yield the attributes and the list of event attributes of every trace of an XES file.
+    Nested attributes are skipped. Every trace is removed from the parsed tree once it
+    has been yielded.
+    """
+    parents = []
+    root = None
+    trace, events = None, None
+    for action, element in iterparse(path, events=("start", "end")):
+        tag = _local_name(element.tag)
+        if action == "start":
+            if root is None:
+                root = element
+            if tag == "trace":
+                trace, events = {}, []
+            elif tag == "event":
+                events.append({})
+            parents.append(tag)
+            continue
+        parents.pop()
+        parent = parents[-1] if parents else None
+        if tag in _XES_ATTRIBUTES and parent in ("trace", "event"):
+            value = _XES_ATTRIBUTES[tag](element.get("value"))
+            (trace if parent == "trace" else events[-1])[element.get("key")] = value
+        elif tag == "trace":
+            yield trace, events
+            root.clear()
+
+
+def read_xes_event_log(
+    path: str,
+    schema: EventLogSchemaTypes,
+    chunksize: int = 100_000,
+    time_format: str = None,
+    utc: bool = True,
+) -> EventLog:
+    """
+    Read an event log from an XES file, passing chunks of about `chunksize` events to
+    `EventLogBuilder`.
+
+    The case columns of `schema` are trace attribute keys and the event columns are
+    event attribute keys, except for the event column of type `CaseID`, which gets the
+    case ID of the event's trace. For example, `cases={"concept:name": CaseID}` and
+    `events={"case:concept:name": CaseID, "concept:name": EventType,
+    "time:timestamp": EventTime}`.
+
+    Args:
+        path (str): The path of the XES file.
+        schema (EventLogSchemaTypes): The schema of the log.
+        chunksize (int): The approximate number of events that are encoded at once.
+        time_format (str): Optional format of the timestamps (see `pd.to_datetime`).
+        utc (bool): Whether to convert the timestamps to UTC. XES timestamps often
+            have different UTC offsets.
+
+    Returns:
+        EventLog: The event log.
+    """
+    case_id_col = schema.get_case_column(CaseID)
+    event_case_id_col = schema.get_event_column(CaseID)
+    builder = EventLogBuilder(schema, time_format=time_format, utc=utc)
+    case_rows, event_rows = [], []
+
+    def flush():
+        builder.add_cases(
+            pd.DataFrame.from_records(case_rows, columns=list(schema.cases))
+        )
+        builder.add_events(
+            pd.DataFrame.from_records(event_rows, columns=list(schema.events))
+        )
+        case_rows.clear()
+        event_rows.clear()
+
+    for trace, events in _iter_xes_traces(path):
+        case_rows.append({col: trace.get(col) for col in schema.cases})
+        for event in events:
+            row = {col: event.get(col) for col in schema.events}
+            row[event_case_id_col] = trace.get(case_id_col)
+            event_rows.append(row)
+        if len(event_rows) >= chunksize:
+            flush()
+    flush()
+    return builder.build()
@@ -0,0 +1,351 @@
+"""
+Finite automata for the Declare templates.
+
+All templates in `regex_representations` are regular. Once instantiated, a template
+only needs to know whether an event matches its first operand, its second operand,
+both, or neither. Each template regex is therefore compiled into a DFA over the
+four-letter alphabet `OTHER`, `MATCH_A`, `MATCH_B` and `MATCH_AB`, and many of these
+DFAs are stepped in lockstep over integer-encoded variants by `AutomataBatch`.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+# Alphabet of the automata: bit 0 is set if an event matches operand `a`, bit 1 if it
+# matches operand `b`.
+OTHER = 0
+MATCH_A = 1
+MATCH_B = 2
+MATCH_AB = 3
+SYMBOLS = (OTHER, MATCH_A, MATCH_B, MATCH_AB)
+
+_LETTER_BITS = {"a": MATCH_A, "b": MATCH_B}
+
+
+@dataclass(frozen=True)
+class Automaton:
+    # Transition table of shape (number of states, 4); state 0 is the initial state.
+    transitions: np.ndarray
+    # Boolean array that marks the accepting states.
+    accepting: np.ndarray
+
+    @property
+    def num_states(self) -> int:
+        return len(self.accepting)
+
+    def reachable(self) -> np.ndarray:
+        """
+        Boolean matrix whose entry (i, j) is True if state `j` can be reached from state
+        `i` with zero or more symbols.
+        """
+        reach = np.eye(self.num_states, dtype=bool)
+        reach[np.arange(self.num_states)[:, None], self.transitions] = True
+        while True:
+            extended = (reach.astype(np.int32) @ reach.astype(np.int32)) > 0
+            if (extended == reach).all():
+                return reach
+            reach = extended
+
+    def can_accept(self) -> np.ndarray:
+        """Mark the states from which an accepting state can still be reached."""
+        return (self.reachable() & self.accepting).any(axis=1)
+
+    def always_accepts(self) -> np.ndarray:
+        """Mark the states from which only accepting states can be reached."""
+        return ~(self.reachable() & ~self.accepting).any(axis=1)
+
+
+def _letter_symbols(letters: str, negated: bool) -> frozenset:
+    bits = 0
+    for letter in letters:
+        bits |= _LETTER_BITS[letter]
+    if negated:
+        return frozenset(s for s in SYMBOLS if not s & bits)
+    return frozenset(s for s in SYMBOLS if s & bits)
+
+
+class _RegexParser:
+    """
+    Recursive descent parser for the regex subset used by `regex_representations`:
+    the letters `a` and `b`, `.`, character classes such as `[^ab]`, groups,
+    alternation and the quantifiers `*`, `+`, `?`, `{n}`, `{n,}` and `{n,m}`.
+    """
+
+    def __init__(self, regex: str):
+        self.regex = regex.removeprefix("^").removesuffix("$")
+        self.pos = 0
+
+    def parse(self):
+        node = self._alternation()
+        if self.pos != len(self.regex):
+            raise ValueError(f"Unexpected `{self.regex[self.pos]}` in `{self.regex}`")
+        return node
+
+    def _peek(self):
+        return self.regex[self.pos] if self.pos < len(self.regex) else None
+
+    def _alternation(self):
+        branches = [self._concatenation()]
+        while self._peek() == "|":
+            self.pos += 1
+            branches.append(self._concatenation())
+        return branches[0] if len(branches) == 1 else ("alt", branches)
+
+    def _concatenation(self):
+        parts = []
+        while self._peek() not in (None, "|", ")"):
+            parts.append(self._repetition())
+        return ("cat", parts)
+
+    def _repetition(self):
+        node = self._atom()
+        while self._peek() in ("*", "+", "?", "{"):
+            char = self._peek()
+            self.pos += 1
+            if char == "*":
+                node = ("rep", node, 0, None)
+            elif char == "+":
+                node = ("rep", node, 1, None)
+            elif char == "?":
+                node = ("rep", node, 0, 1)
+            else:
+                end = self.regex.index("}", self.pos)
+                bounds = self.regex[self.pos : end].split(",")
+                self.pos = end + 1
+                lo = int(bounds[0])
+                if len(bounds) == 1:
+                    hi = lo
+                else:
+                    hi = int(bounds[1]) if bounds[1].strip() else None
+                node = ("rep", node, lo, hi)
+        return node
+
+    def _atom(self):
+        char = self._peek()
+        if char == "(":
+            self.pos += 1
+            node = self._alternation()
+            if self._peek() != ")":
+                raise ValueError(f"Unbalanced parenthesis in `{self.regex}`")
+            self.pos += 1
+            return node
+        if char == "[":
+            end = self.regex.index("]", self.pos)
+            content = self.regex[self.pos + 1 : end]
+            self.pos = end + 1
+            if content.startswith("^"):
+                return ("sym", _letter_symbols(content[1:], negated=True))
+            return ("sym", _letter_symbols(content, negated=False))
+        if char == ".":
+            self.pos += 1
+            return ("sym", frozenset(SYMBOLS))
+        if char in _LETTER_BITS:
+            self.pos += 1
+            return ("sym", _letter_symbols(char, negated=False))
+        raise ValueError(f"Unsupported token `{char}` in `{self.regex}`")
+
+
+class _NFA:
+    def __init__(self):
+        self.epsilon = []
+        self.edges = []
+
+    def new_state(self) -> int:
+        self.epsilon.append([])
+        self.edges.append([])
+        return len(self.edges) - 1
+
+    def build(self, node) -> tuple[int, int]:
+        kind = node[0]
+        if kind == "sym":
+            start, end = self.new_state(), self.new_state()
+            self.edges[start].append((node[1], end))
+            return start, end
+        if kind == "cat":
+            start = end = self.new_state()
+            for part in node[1]:
+                part_start, part_end = self.build(part)
+                self.epsilon[end].append(part_start)
+                end = part_end
+            return start, end
+        if kind == "alt":
+            start, end = self.new_state(), self.new_state()
+            for branch in node[1]:
+                branch_start, branch_end = self.build(branch)
+                self.epsilon[start].append(branch_start)
+                self.epsilon[branch_end].append(end)
+            return start, end
+        # repetition: `lo` mandatory copies followed by a loop or `hi - lo` optional ones
+        _, child, lo, hi = node
+        start = end = self.new_state()
+        for _ in range(lo):
+            child_start, child_end = self.build(child)
+            self.epsilon[end].append(child_start)
+            end = child_end
+        if hi is None:
+            child_start, child_end = self.build(child)
+            loop_end = self.new_state()
+            self.epsilon[end] += [child_start, loop_end]
+            self.epsilon[child_end] += [child_start, loop_end]
+            end = loop_end
+        else:
+            for _ in range(hi - lo):
+                child_start, child_end = self.build(child)
+                optional_end = self.new_state()
+                self.epsilon[end] += [child_start, optional_end]
+                self.epsilon[child_end].append(optional_end)
+                end = optional_end
+        return start, end
+
+    def closure(self, states) -> frozenset:
+        stack = list(states)
+        seen = set(states)
+        while stack:
+            for target in self.epsilon[stack.pop()]:
+                if target not in seen:
+                    seen.add(target)
+                    stack.append(target)
+        return frozenset(seen)
+
+
+@lru_cache(maxsize=None)
+def compile_regex(regex: str) -> Automaton:
+    """
+    Compile an (instantiated) template regex into a DFA using the subset construction.
+    The regex has to match the complete variant, as with the anchored patterns in
+    `regex_representations`.
+    """
+    nfa = _NFA()
+    nfa_start, nfa_end = nfa.build(_RegexParser(regex).parse())
+
+    start = nfa.closure([nfa_start])
+    state_ids = {start: 0}
+    subsets = [start]
+    transitions = []
+    i = 0
+    while i < len(subsets):
+        row = []
+        for symbol in SYMBOLS:
+            targets = [
+                target
+                for state in subsets[i]
+                for symbols, target in nfa.edges[state]
+                if symbol in symbols
+            ]
+            subset = nfa.closure(targets)
+            if subset not in state_ids:
+                state_ids[subset] = len(subsets)
+                subsets.append(subset)
+            row.append(state_ids[subset])
+        transitions.append(row)
+        i += 1
+    return Automaton(
+        transitions=np.array(transitions, dtype=np.int32),
+        accepting=np.array([nfa_end in subset for subset in subsets], dtype=bool),
+    )
+
+
+class AutomataBatch:
+    """
+    A batch of template automata that are evaluated together in a single sweep over
+    integer-encoded variants.
+
+    Every automaton is bound to the activity IDs that count as its operands `a` and `b`
+    (more than one ID per operand is possible, e.g. for event hierarchies) and to the
+    operand indices that activate it (see `activation_based_on`). An empty activation
+    list means the automaton is always activated.
+    """
+
+    def __init__(self, num_activities: int):
+        self.num_activities = num_activities
+        self.automata: list[Automaton] = []
+        self._symbols: list[np.ndarray] = []
+        self._activations: list[np.ndarray] = []
+
+    def __len__(self):
+        return len(self.automata)
+
+    def add(
+        self,
+        automaton: Automaton,
+        a_ids: list[int],
+        b_ids: list[int] = (),
+        activated_by: list[int] = (),
+    ) -> int:
+        symbols = np.zeros(self.num_activities, dtype=np.uint8)
+        symbols[list(a_ids)] |= MATCH_A
+        symbols[list(b_ids)] |= MATCH_B
+        activation = np.ones(len(SYMBOLS), dtype=bool)
+        if len(activated_by) > 0:
+            bits = 0
+            for operand in activated_by:
+                bits |= MATCH_A if operand == 0 else MATCH_B
+            activation = np.array([bool(s & bits) for s in SYMBOLS])
+        self.automata.append(automaton)
+        self._symbols.append(symbols)
+        self._activations.append(activation)
+        return len(self.automata) - 1
+
+    def run(
+        self, codes: np.ndarray, offsets: np.ndarray, batch_size: int = 1024
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Step all automata over all variants.
+
+        Args:
+            codes (np.ndarray): Concatenated activity IDs of all variants.
+            offsets (np.ndarray): Start offset of each variant in `codes`, followed by
+                the total length.
+            batch_size (int): Maximum number of automata stepped together, which bounds
+                the memory used for the state matrix.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Boolean satisfaction and activation matrices
+            of shape (number of variants, number of automata).
+        """
+        lengths = np.diff(offsets)
+        num_variants = len(lengths)
+        satisfaction = np.zeros((num_variants, len(self)), dtype=bool)
+        activation = np.zeros((num_variants, len(self)), dtype=bool)
+        if num_variants == 0 or len(self) == 0:
+            return satisfaction, activation
+
+        # Process variants longest first so that the variants that are still running at
+        # position `t` are always a prefix of `order`.
+        order = np.argsort(-lengths, kind="stable")
+        starts = offsets[:-1][order]
+        num_running = np.searchsorted(
+            -lengths[order], -np.arange(lengths.max()), side="left"
+        )
+        for first in range(0, len(self), batch_size):
+            last = min(first + batch_size, len(self))
+            sat, act = self._run_batch(first, last, codes, starts, num_running)
+            satisfaction[order, first:last] = sat
+            activation[order, first:last] = act
+        return satisfaction, activation
+
+    def _run_batch(self, first, last, codes, starts, num_running):
+        automata = self.automata[first:last]
+        num_automata = len(automata)
+        num_states = max(automaton.num_states for automaton in automata)
+        transitions = np.zeros((num_automata, num_states, len(SYMBOLS)), np.int32)
+        accepting = np.zeros((num_automata, num_states), dtype=bool)
+        for i, automaton in enumerate(automata):
+            transitions[i, : automaton.num_states] = automaton.transitions
+            accepting[i, : automaton.num_states] = automaton.accepting
+        symbol_table = np.stack(self._symbols[first:last])
+        activation_table = np.stack(self._activations[first:last]).reshape(-1)
+        transitions = transitions.reshape(-1)
+
+        state_base = np.arange(num_automata, dtype=np.int64) * num_states
+        symbol_base = np.arange(num_automata, dtype=np.int64) * len(SYMBOLS)
+        states = np.zeros((len(starts), num_automata), dtype=np.int64)
+        activated = np.zeros((len(starts), num_automata), dtype=bool)
+        activated[:] = activation_table.reshape(num_automata, -1).all(axis=1)
+        for t, k in enumerate(num_running):
+            symbols = symbol_table[:, codes[starts[:k] + t]].T
+            states[:k] = transitions[(state_base + states[:k]) * len(SYMBOLS) + symbols]
+            activated[:k] |= activation_table[symbol_base + symbols]
+        return accepting.reshape(-1)[state_base + states], activated
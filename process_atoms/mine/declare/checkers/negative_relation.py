@@ -1,55 +1,38 @@
-from datetime import timedelta
-
+from process_atoms.mine.declare.checkers.relation import PendingActivations
 from process_atoms.mine.declare.enums.mp_constants import TraceState
 from process_atoms.mine.declare.models.checker_result import CheckerResult
-from process_atoms.mine.declare.parsers.decl_parser import (
-    parse_data_cond,
-    parse_time_cond,
+from process_atoms.mine.declare.parsers.condition_compiler import (
+    conjunction,
+    data_predicate,
+    time_predicate,
 )
 
-# Defining global and local functions/variables to use within eval() to prevent code injection
-glob = {"__builtins__": None}
-
 
 # mp-not-responded-existence constraint checker
 # Description:
 def mp_not_responded_existence(trace, done, a, b, rules):
-    activation_rules = parse_data_cond(rules["activation"])
-    correlation_rules = parse_data_cond(rules["correlation"])
-    time_rule = parse_time_cond(rules["time"])
-
-    pendings = []
+    activation = data_predicate(rules["activation"])
+    pendings = PendingActivations(rules)
     num_fulfillments = 0
     num_violations = 0
     num_pendings = 0
 
     for event in trace:
         if event == a:
-            locl = {"A": event}
-            if eval(activation_rules, glob, locl):
+            if activation is None or activation(event):
                 pendings.append(event)
 
     for event in trace:
-        if not pendings:
+        if pendings.num_pending == 0:
             break
 
         if event == b:
-            for A in reversed(pendings):
-                locl = {
-                    "A": A,
-                    "T": event,
-                    "timedelta": timedelta,
-                    "abs": abs,
-                    "float": float,
-                }
-                if eval(correlation_rules, glob, locl) and eval(time_rule, glob, locl):
-                    pendings.remove(A)
-                    num_violations += 1
+            num_violations += pendings.resolve(event)
 
     if done:
-        num_fulfillments = len(pendings)
+        num_fulfillments = pendings.num_pending
     else:
-        num_pendings = len(pendings)
+        num_pendings = pendings.num_pending
 
     num_activations = num_fulfillments + num_violations + num_pendings
     vacuous_satisfaction = rules["vacuous_satisfaction"]
@@ -79,38 +62,24 @@ def mp_not_responded_existence(trace, done, a, b, rules):
 # mp-not-response constraint checker
 # Description:
 def mp_not_response(trace, done, a, b, rules):
-    activation_rules = parse_data_cond(rules["activation"])
-    correlation_rules = parse_data_cond(rules["correlation"])
-    time_rule = parse_time_cond(rules["time"])
-
-    pendings = []
+    activation = data_predicate(rules["activation"])
+    pendings = PendingActivations(rules)
     num_fulfillments = 0
     num_violations = 0
     num_pendings = 0
 
     for event in trace:
         if event == a:
-            locl = {"A": event}
-            if eval(activation_rules, glob, locl):
+            if activation is None or activation(event):
                 pendings.append(event)
 
-        if pendings and event == b:
-            for A in reversed(pendings):
-                locl = {
-                    "A": A,
-                    "T": event,
-                    "timedelta": timedelta,
-                    "abs": abs,
-                    "float": float,
-                }
-                if eval(correlation_rules, glob, locl) and eval(time_rule, glob, locl):
-                    pendings.remove(A)
-                    num_violations += 1
+        if pendings.num_pending > 0 and event == b:
+            num_violations += pendings.resolve(event)
 
     if done:
-        num_fulfillments = len(pendings)
+        num_fulfillments = pendings.num_pending
     else:
-        num_pendings = len(pendings)
+        num_pendings = pendings.num_pending
 
     num_activations = num_fulfillments + num_violations + num_pendings
     vacuous_satisfaction = rules["vacuous_satisfaction"]
@@ -140,9 +109,10 @@ def mp_not_response(trace, done, a, b, rules):
 # mp-not-chain-response constraint checker
 # Description:
 def mp_not_chain_response(trace, done, a, b, rules):
-    activation_rules = parse_data_cond(rules["activation"])
-    correlation_rules = parse_data_cond(rules["correlation"])
-    time_rule = parse_time_cond(rules["time"])
+    activation = data_predicate(rules["activation"])
+    fulfills = conjunction(
+        data_predicate(rules["correlation"]), time_predicate(rules["time"])
+    )
 
     num_activations = 0
     num_violations = 0
@@ -150,23 +120,12 @@ def mp_not_chain_response(trace, done, a, b, rules):
 
     for index, event in enumerate(trace):
         if event == a:
-            locl = {"A": event}
-
-            if eval(activation_rules, glob, locl):
+            if activation is None or activation(event):
                 num_activations += 1
 
                 if index < len(trace) - 1:
                     if trace[index + 1] == b:
-                        locl = {
-                            "A": event,
-                            "T": trace[index + 1],
-                            "timedelta": timedelta,
-                            "abs": abs,
-                            "float": float,
-                        }
-                        if eval(correlation_rules, glob, locl) and eval(
-                            time_rule, glob, locl
-                        ):
+                        if fulfills is None or fulfills(event, trace[index + 1]):
                             num_violations += 1
                 else:
                     if not done:
@@ -200,9 +159,10 @@ def mp_not_chain_response(trace, done, a, b, rules):
 # mp-not-precedence constraint checker
 # Description:
 def mp_not_precedence(trace, done, a, b, rules):
-    activation_rules = parse_data_cond(rules["activation"])
-    correlation_rules = parse_data_cond(rules["correlation"])
-    time_rule = parse_time_cond(rules["time"])
+    activation = data_predicate(rules["activation"])
+    fulfills = conjunction(
+        data_predicate(rules["correlation"]), time_predicate(rules["time"])
+    )
 
     num_activations = 0
     num_violations = 0
@@ -213,22 +173,11 @@ def mp_not_precedence(trace, done, a, b, rules):
             Ts.append(event)
 
         if event == b:
-            locl = {"A": event}
-
-            if eval(activation_rules, glob, locl):
+            if activation is None or activation(event):
                 num_activations += 1
 
                 for T in Ts:
-                    locl = {
-                        "A": event,
-                        "T": T,
-                        "timedelta": timedelta,
-                        "abs": abs,
-                        "float": float,
-                    }
-                    if eval(correlation_rules, glob, locl) and eval(
-                        time_rule, glob, locl
-                    ):
+                    if fulfills is None or fulfills(event, T):
                         num_violations += 1
                         break
 
@@ -260,31 +209,21 @@ def mp_not_precedence(trace, done, a, b, rules):
 # mp-not-chain-precedence constraint checker
 # Description:
 def mp_not_chain_precedence(trace, done, a, b, rules):
-    activation_rules = parse_data_cond(rules["activation"])
-    correlation_rules = parse_data_cond(rules["correlation"])
-    time_rule = parse_time_cond(rules["time"])
+    activation = data_predicate(rules["activation"])
+    fulfills = conjunction(
+        data_predicate(rules["correlation"]), time_predicate(rules["time"])
+    )
 
     num_activations = 0
     num_violations = 0
 
     for index, event in enumerate(trace):
         if event == b:
-            locl = {"A": event}
-
-            if eval(activation_rules, glob, locl):
+            if activation is None or activation(event):
                 num_activations += 1
 
                 if index != 0 and trace[index - 1] == a:
-                    locl = {
-                        "A": event,
-                        "T": trace[index - 1],
-                        "timedelta": timedelta,
-                        "abs": abs,
-                        "float": float,
-                    }
-                    if eval(correlation_rules, glob, locl) and eval(
-                        time_rule, glob, locl
-                    ):
+                    if fulfills is None or fulfills(event, trace[index - 1]):
                         num_violations += 1
 
     num_fulfillments = num_activations - num_violations
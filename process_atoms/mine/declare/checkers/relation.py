@@ -1,14 +1,78 @@
-from datetime import timedelta
-
 from process_atoms.mine.declare.enums.mp_constants import TraceState
 from process_atoms.mine.declare.models.checker_result import CheckerResult
-from process_atoms.mine.declare.parsers.decl_parser import (
-    parse_data_cond,
-    parse_time_cond,
+from process_atoms.mine.declare.parsers.condition_compiler import (
+    conjunction,
+    data_predicate,
+    same_attributes,
+    time_predicate,
 )
 
-# Defining global and local functions/variables to use within eval() to prevent code injection
-glob = {"__builtins__": None}
+
+class PendingActivations:
+    """
+    The activations of a trace in the order of their occurrence, of which the first
+    `num_resolved` are no longer pending.
+
+    A target resolves the latest pending activation that it fulfills together with all
+    earlier pending activations. This is the result of the former loop over
+    `reversed(pendings)` with `pendings.remove(A)`, as all activations are equal to the
+    activity and `remove` thus always removed the first pending activation.
+
+    Trivial conditions resolve all pending activations at once. If the correlation
+    condition consists of `same` conditions only, the activations are kept in buckets
+    by the values of these attributes, and a target only evaluates the time condition
+    on its own bucket, from the latest activation backwards. Any other correlation
+    condition, e.g. with `different`, is evaluated on all pending activations from the
+    latest backwards, so a trace with `n` activations and `m` targets takes O(n * m)
+    evaluations if the condition rarely holds.
+    """
+
+    def __init__(self, rules: dict):
+        correlation = data_predicate(rules["correlation"])
+        time = time_predicate(rules["time"])
+        self.attributes = same_attributes(correlation)
+        if self.attributes is None:
+            self.fulfills = conjunction(correlation, time)
+        else:
+            self.fulfills = time
+        self.activations = []
+        # indices of the activations by the values of `attributes`
+        self.buckets = {}
+        self.num_resolved = 0
+
+    @property
+    def num_pending(self) -> int:
+        return len(self.activations) - self.num_resolved
+
+    def append(self, activation):
+        if self.attributes is not None:
+            key = self._key(activation)
+            if key is not None:
+                self.buckets.setdefault(key, []).append(len(self.activations))
+        self.activations.append(activation)
+
+    def resolve(self, target) -> int:
+        """Resolve the activations that `target` resolves and return their number."""
+        for i in self._candidates(target):
+            if i < self.num_resolved:
+                break
+            if self.fulfills is None or self.fulfills(self.activations[i], target):
+                resolved = i + 1 - self.num_resolved
+                self.num_resolved = i + 1
+                return resolved
+        return 0
+
+    def _candidates(self, target):
+        """Return the indices of the activations `target` may fulfill, latest first."""
+        if self.attributes is None:
+            return range(len(self.activations) - 1, -1, -1)
+        key = self._key(target)
+        return reversed(self.buckets.get(key, [])) if key is not None else ()
+
+    def _key(self, event):
+        if all(attribute in event for attribute in self.attributes):
+            return tuple(event[attribute] for attribute in self.attributes)
+        return None
 
 
 # mp-responded-existence constraint checker
@@ -18,42 +82,28 @@ glob = {"__builtins__": None}
 # then event b occurs in the trace as well.
 # Event a activates the constraint.
 def mp_responded_existence(trace, done, a, b, rules):
-    activation_rules = parse_data_cond(rules["activation"])
-    correlation_rules = parse_data_cond(rules["correlation"])
-    time_rule = parse_time_cond(rules["time"])
-
-    pendings = []
+    activation = data_predicate(rules["activation"])
+    pendings = PendingActivations(rules)
     num_fulfillments = 0
     num_violations = 0
     num_pendings = 0
 
     for event in trace:
         if event == a:
-            locl = {"A": event}
-            if eval(activation_rules, glob, locl):
+            if activation is None or activation(event):
                 pendings.append(event)
 
     for event in trace:
-        if not pendings:
+        if pendings.num_pending == 0:
             break
 
         if event == b:
-            for A in reversed(pendings):
-                locl = {
-                    "A": A,
-                    "T": event,
-                    "timedelta": timedelta,
-                    "abs": abs,
-                    "float": float,
-                }
-                if eval(correlation_rules, glob, locl) and eval(time_rule, glob, locl):
-                    pendings.remove(A)
-                    num_fulfillments += 1
+            num_fulfillments += pendings.resolve(event)
 
     if done:
-        num_violations = len(pendings)
+        num_violations = pendings.num_pending
     else:
-        num_pendings = len(pendings)
+        num_pendings = pendings.num_pending
 
     num_activations = num_fulfillments + num_violations + num_pendings
     vacuous_satisfaction = rules["vacuous_satisfaction"]
@@ -88,38 +138,24 @@ def mp_responded_existence(trace, done, a, b, rules):
 # if event a occurs in the trace, then event b occurs after a.
 # Event a activates the constraint.
 def mp_response(trace, done, a, b, rules):
-    activation_rules = parse_data_cond(rules["activation"])
-    correlation_rules = parse_data_cond(rules["correlation"])
-    time_rule = parse_time_cond(rules["time"])
-
-    pendings = []
+    activation = data_predicate(rules["activation"])
+    pendings = PendingActivations(rules)
     num_fulfillments = 0
     num_violations = 0
     num_pendings = 0
 
     for event in trace:
         if event == a:
-            locl = {"A": event}
-            if eval(activation_rules, glob, locl):
+            if activation is None or activation(event):
                 pendings.append(event)
 
-        if pendings and event == b:
-            for A in reversed(pendings):
-                locl = {
-                    "A": A,
-                    "T": event,
-                    "timedelta": timedelta,
-                    "abs": abs,
-                    "float": float,
-                }
-                if eval(correlation_rules, glob, locl) and eval(time_rule, glob, locl):
-                    pendings.remove(A)
-                    num_fulfillments += 1
+        if pendings.num_pending > 0 and event == b:
+            num_fulfillments += pendings.resolve(event)
 
     if done:
-        num_violations = len(pendings)
+        num_violations = pendings.num_pending
     else:
-        num_pendings = len(pendings)
+        num_pendings = pendings.num_pending
 
     num_activations = num_fulfillments + num_violations + num_pendings
     vacuous_satisfaction = rules["vacuous_satisfaction"]
@@ -155,9 +191,10 @@ def mp_response(trace, done, a, b, rules):
 # before event a recurs.
 # Event a activates the constraint.
 def mp_alternate_response(trace, done, a, b, rules):
-    activation_rules = parse_data_cond(rules["activation"])
-    correlation_rules = parse_data_cond(rules["correlation"])
-    time_rule = parse_time_cond(rules["time"])
+    activation = data_predicate(rules["activation"])
+    fulfills = conjunction(
+        data_predicate(rules["correlation"]), time_predicate(rules["time"])
+    )
 
     pending = None
     num_activations = 0
@@ -166,20 +203,12 @@ def mp_alternate_response(trace, done, a, b, rules):
 
     for event in trace:
         if event == a:
-            locl = {"A": event}
-            if eval(activation_rules, glob, locl):
+            if activation is None or activation(event):
                 pending = event
                 num_activations += 1
 
         if event == b and pending is not None:
-            locl = {
-                "A": pending,
-                "T": event,
-                "timedelta": timedelta,
-                "abs": abs,
-                "float": float,
-            }
-            if eval(correlation_rules, glob, locl) and eval(time_rule, glob, locl):
+            if fulfills is None or fulfills(pending, event):
                 pending = None
                 num_fulfillments += 1
 
@@ -219,9 +248,10 @@ def mp_alternate_response(trace, done, a, b, rules):
 # each time event a occurs in the trace, event b occurs immediately afterwards.
 # Event a activates the constraint.
 def mp_chain_response(trace, done, a, b, rules):
-    activation_rules = parse_data_cond(rules["activation"])
-    correlation_rules = parse_data_cond(rules["correlation"])
-    time_rule = parse_time_cond(rules["time"])
+    activation = data_predicate(rules["activation"])
+    fulfills = conjunction(
+        data_predicate(rules["correlation"]), time_predicate(rules["time"])
+    )
 
     num_activations = 0
     num_fulfillments = 0
@@ -229,23 +259,12 @@ def mp_chain_response(trace, done, a, b, rules):
 
     for index, event in enumerate(trace):
         if event == a:
-            locl = {"A": event}
-
-            if eval(activation_rules, glob, locl):
+            if activation is None or activation(event):
                 num_activations += 1
 
                 if index < len(trace) - 1:
                     if trace[index + 1] == b:
-                        locl = {
-                            "A": event,
-                            "T": trace[index + 1],
-                            "timedelta": timedelta,
-                            "abs": abs,
-                            "float": float,
-                        }
-                        if eval(correlation_rules, glob, locl) and eval(
-                            time_rule, glob, locl
-                        ):
+                        if fulfills is None or fulfills(event, trace[index + 1]):
                             num_fulfillments += 1
                 else:
                     if not done:
@@ -283,9 +302,10 @@ def mp_chain_response(trace, done, a, b, rules):
 # The history-based constraint precedence(a,b) indicates that event b occurs
 # only in the trace, if preceded by a. Event b activates the constraint.
 def mp_precedence(trace, done, a, b, rules):
-    activation_rules = parse_data_cond(rules["activation"])
-    correlation_rules = parse_data_cond(rules["correlation"])
-    time_rule = parse_time_cond(rules["time"])
+    activation = data_predicate(rules["activation"])
+    fulfills = conjunction(
+        data_predicate(rules["correlation"]), time_predicate(rules["time"])
+    )
 
     num_activations = 0
     num_fulfillments = 0
@@ -296,22 +316,11 @@ def mp_precedence(trace, done, a, b, rules):
             Ts.append(event)
 
         if event == b:
-            locl = {"A": event}
-
-            if eval(activation_rules, glob, locl):
+            if activation is None or activation(event):
                 num_activations += 1
 
                 for T in Ts:
-                    locl = {
-                        "A": event,
-                        "T": T,
-                        "timedelta": timedelta,
-                        "abs": abs,
-                        "float": float,
-                    }
-                    if eval(correlation_rules, glob, locl) and eval(
-                        time_rule, glob, locl
-                    ):
+                    if fulfills is None or fulfills(event, T):
                         num_fulfillments += 1
                         break
 
@@ -347,9 +356,10 @@ def mp_precedence(trace, done, a, b, rules):
 # it is preceded by event a and no other event b can recur in between.
 # Event b activates the constraint.
 def mp_alternate_precedence(trace, done, a, b, rules):
-    activation_rules = parse_data_cond(rules["activation"])
-    correlation_rules = parse_data_cond(rules["correlation"])
-    time_rule = parse_time_cond(rules["time"])
+    activation = data_predicate(rules["activation"])
+    fulfills = conjunction(
+        data_predicate(rules["correlation"]), time_predicate(rules["time"])
+    )
 
     num_activations = 0
     num_fulfillments = 0
@@ -360,20 +370,10 @@ def mp_alternate_precedence(trace, done, a, b, rules):
             Ts.append(event)
 
         if event == b:
-            locl = {"A": event}
-            if eval(activation_rules, glob, locl):
+            if activation is None or activation(event):
                 num_activations += 1
                 for T in Ts:
-                    locl = {
-                        "A": event,
-                        "T": T,
-                        "timedelta": timedelta,
-                        "abs": abs,
-                        "float": float,
-                    }
-                    if eval(correlation_rules, glob, locl) and eval(
-                        time_rule, glob, locl
-                    ):
+                    if fulfills is None or fulfills(event, T):
                         num_fulfillments += 1
                         break
                 Ts = []
@@ -409,31 +409,21 @@ def mp_alternate_precedence(trace, done, a, b, rules):
 # each time event b occurs in the trace, event a occurs immediately beforehand.
 # Event b activates the constraint.
 def mp_chain_precedence(trace, done, a, b, rules):
-    activation_rules = parse_data_cond(rules["activation"])
-    correlation_rules = parse_data_cond(rules["correlation"])
-    time_rule = parse_time_cond(rules["time"])
+    activation = data_predicate(rules["activation"])
+    fulfills = conjunction(
+        data_predicate(rules["correlation"]), time_predicate(rules["time"])
+    )
 
     num_activations = 0
     num_fulfillments = 0
 
     for index, event in enumerate(trace):
         if event == b:
-            locl = {"A": event}
-
-            if eval(activation_rules, glob, locl):
+            if activation is None or activation(event):
                 num_activations += 1
 
                 if index != 0 and trace[index - 1] == a:
-                    locl = {
-                        "A": event,
-                        "T": trace[index - 1],
-                        "timedelta": timedelta,
-                        "abs": abs,
-                        "float": float,
-                    }
-                    if eval(correlation_rules, glob, locl) and eval(
-                        time_rule, glob, locl
-                    ):
+                    if fulfills is None or fulfills(event, trace[index - 1]):
                         num_fulfillments += 1
 
     num_violations = num_activations - num_fulfillments
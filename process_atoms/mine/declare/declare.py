@@ -6,17 +6,17 @@ import warnings
 from itertools import combinations, product
 from typing import List
 
+import numpy as np
 import pandas as pd
-from mlxtend.frequent_patterns import apriori, fpgrowth
-from mlxtend.preprocessing import TransactionEncoder
 from tqdm import tqdm
 
-from process_atoms.mine.declare.enums.mp_constants import Template, TraceState
+from process_atoms.mine.declare.enums.mp_constants import Template
 from process_atoms.mine.declare.functions import (
-    check_trace_conformance,
+    check_traces_conformance,
     discover_constraint,
     query_constraint,
 )
+from process_atoms.mine.declare.models.binary_log_encoding import BinaryLogEncoding
 from process_atoms.mine.declare.models.checker_result import CheckerResult
 from process_atoms.models.event_log import EventLog
 
@@ -42,7 +42,10 @@ class Declare:
     supported_templates : tuple[str]
         tuple containing all the DECLARE templates supported by the Declare4Py library
     binary_encoded_log : DataFrame
-        the binary encoded version of the input log
+        the binary encoded version of the input log, computed by log_encoding() only
+    variant_encoding : BinaryLogEncoding
+        the sparse binary encoded version of the trace variants of the input log, from which the frequent item
+        sets are computed
     frequent_item_sets : DataFrame
         list of the most frequent item sets found along the log traces, together with their support and length
     conformance_checking_results : int: dict[str: CheckerResult]]
@@ -65,6 +68,7 @@ class Declare:
         self.log_length = None
         self.supported_templates = tuple(map(lambda c: c.templ_str, Template))
         self.binary_encoded_log = None
+        self.variant_encoding = None
         self.frequent_item_sets = None
         self.conformance_checking_results = None
         self.query_checking_results = None
@@ -80,26 +84,41 @@ class Declare:
         binary_encoded_log
             the one-hot encoding of the input log, made over activity names.
         """
+        self.binary_encoded_log = self.variant_log_encoding().to_frame(
+            self.log.variant_index.case_variants
+        )
+        return self.binary_encoded_log
+
+    def variant_log_encoding(self) -> BinaryLogEncoding:
+        """
+        Return the sparse log binary encoding of the trace variants, i.e. the one-hot encoding stating whether an
+        attribute is contained or not inside each trace variant of the log, weighted by the number of traces of
+        the variant.
+
+        Returns
+        -------
+        variant_encoding
+            the sparse one-hot encoding of the trace variants of the input log, made over activity names.
+        """
         if self.log is None:
             raise RuntimeError("You must load a log before.")
-        te = TransactionEncoder()
-        activity_sequences = self.log.activity_sequences()
-        te_ary = te.fit(activity_sequences).transform(activity_sequences)
-        self.binary_encoded_log = pd.DataFrame(te_ary, columns=te.columns_)
-        return self.binary_encoded_log
+        self.variant_encoding = BinaryLogEncoding.from_log(self.log)
+        return self.variant_encoding
 
     def compute_frequent_itemsets(
         self, min_support: float, algorithm: str = "fpgrowth", len_itemset: int = None
     ) -> None:
         """
-        Compute the most frequent item sets with a support greater or equal than 'min_support' with the given algorithm.
+        Compute the most frequent item sets with a support greater or equal than 'min_support' with a weighted
+        apriori over the trace variants.
 
         Parameters
         ----------
         min_support: float
             the minimum support of the returned item sets.
         algorithm : str, optional
-            the algorithm for extracting frequent itemsets, choose between 'fpgrowth' (default) and 'apriori'.
+            kept for compatibility, either 'fpgrowth' (default) or 'apriori'. Both values run the same weighted
+            apriori, which finds the same item sets with the same support as either algorithm of mlxtend.
         len_itemset : int, optional
             the maximum length of the extracted itemsets.
         """
@@ -108,35 +127,42 @@ class Declare:
         if not 0 <= min_support <= 1:
             raise RuntimeError("Min. support must be in range [0, 1].")
         if min_support == 0:
-            # Calculate all unique item sets up to length 2
-            lst = list(self.log.unique_activities())
-            unique_item_sets = set()
-            for i in range(1, len_itemset + 1):  # range up to length
-                for combo in combinations(lst, i):
-                    unique_item_sets.add(frozenset(combo))
-            # Convert set to list and create pandas Series
-            series = pd.Series(list(unique_item_sets))
-            self.frequent_item_sets = pd.DataFrame({"itemsets": series})
+            # all item sets up to the given length, without computing their support
+            activities = list(self.log.unique_activities())
+            if len_itemset <= 2:
+                item_sets = [frozenset([a]) for a in activities]
+                if len_itemset == 2:
+                    first, second = np.triu_indices(len(activities), k=1)
+                    item_sets += [
+                        frozenset([activities[i], activities[j]])
+                        for i, j in zip(first.tolist(), second.tolist())
+                    ]
+            else:
+                item_sets = [
+                    frozenset(combo)
+                    for i in range(1, len_itemset + 1)
+                    for combo in combinations(activities, i)
+                ]
+            self.frequent_item_sets = pd.DataFrame(
+                {"itemsets": pd.Series(item_sets, dtype=object)}
+            )
             self.frequent_item_sets["support"] = -1
             self.frequent_item_sets["length"] = self.frequent_item_sets[
                 "itemsets"
             ].apply(lambda x: len(x))
             return
-            # calculate all item sets up to the given length
 
-        self.log_encoding()
-        if algorithm == "fpgrowth":
-            frequent_itemsets = fpgrowth(
-                self.binary_encoded_log, min_support=min_support, use_colnames=True
-            )
-        elif algorithm == "apriori":
-            frequent_itemsets = apriori(
-                self.binary_encoded_log, min_support=min_support, use_colnames=True
-            )
-        else:
+        if algorithm not in ("fpgrowth", "apriori"):
             raise RuntimeError(
                 f"{algorithm} algorithm not supported. Choose between fpgrowth and apriori"
             )
+        self.variant_log_encoding()
+        if len_itemset == 2:
+            frequent_itemsets = self.variant_encoding.frequent_pairs(min_support)
+        else:
+            frequent_itemsets = self.variant_encoding.frequent_itemsets(
+                min_support, max_len=len_itemset
+            )
         frequent_itemsets["length"] = frequent_itemsets["itemsets"].apply(
             lambda x: len(x)
         )
@@ -177,14 +203,11 @@ class Declare:
         self.conformance_checking_results = {}
         # get unique traces from events data frame
         variants = self.log.trace_variants
-        for variant, case_idxs in variants.items():
-            trc_res = check_trace_conformance(variant, self.model, consider_vacuity)
+        results = check_traces_conformance(variants, self.model, consider_vacuity)
+        for row, case_idxs in enumerate(variants.values()):
+            violated = results.violated(row)
             for case_idx in case_idxs:
-                self.conformance_checking_results[case_idx] = {
-                    const
-                    for const, res in trc_res.items()
-                    if res.state == TraceState.VIOLATED
-                }
+                self.conformance_checking_results[case_idx] = set(violated)
         return self.conformance_checking_results
 
     def discovery(
@@ -1,4 +1,7 @@
 from math import ceil
+from typing import Callable, Iterable
+
+import numpy as np
 
 from process_atoms.mine.declare.checkers.choice import mp_choice, mp_exclusive_choice
 from process_atoms.mine.declare.checkers.existence import (
@@ -26,284 +29,210 @@ from process_atoms.mine.declare.checkers.relation import (
 )
 from process_atoms.mine.declare.enums.mp_constants import Template, TraceState
 from process_atoms.mine.declare.models.checker_result import CheckerResult
+from process_atoms.mine.declare.models.conformance_matrix import (
+    STATES,
+    ConformanceMatrix,
+)
 from process_atoms.mine.declare.models.decl_model import DeclModel
+from process_atoms.mine.declare.parsers.condition_compiler import (
+    compile_data_condition,
+    compile_time_condition,
+)
 from process_atoms.models.event_log import EventLog
 
 
-def check_trace_conformance(trace, model, consider_vacuity):
+def compiled_conditions(model: DeclModel, constraint: dict) -> dict:
     """
-    Check the conformance of a trace with a model.
-    TODO currently trace is an activity sequence only (no event)
+    Return the compiled activation, correlation and time conditions of a constraint,
+    by their keys in the `rules` of the checkers. The conditions are compiled once and
+    cached on the model.
+
+    Raises:
+        SyntaxError: If a condition is not properly formatted.
+    """
+    template = constraint["template"]
+    # the checkers of init and end only use the activation condition. The templates
+    # are compared by identity, as they are equal as strings.
+    uses_time = template is not Template.INIT and template is not Template.END
+    key = (template.is_binary, uses_time, tuple(constraint["condition"]))
+    conditions = model.compiled_conditions.get(key)
+    if conditions is None:
+        conditions = {"activation": compile_data_condition(constraint["condition"][0])}
+        if template.is_binary:
+            conditions["correlation"] = compile_data_condition(
+                constraint["condition"][1]
+            )
+        if uses_time:
+            # time condition is always at last position
+            conditions["time"] = compile_time_condition(constraint["condition"][-1])
+        model.compiled_conditions[key] = conditions
+    return conditions
+
+
+def _combined(response_checker, precedence_checker):
+    """
+    Return a checker of a succession template that combines the checkers of its
+    response and precedence parts.
     """
-    rules = {"vacuous_satisfaction": consider_vacuity}
 
-    # Set containing all constraints that raised SyntaxError in checker functions
-    error_constraint_set = set()
+    def check(trace, done, a, b, rules):
+        response = response_checker(trace, done, a, b, rules)
+        precedence = precedence_checker(trace, done, a, b, rules)
+        return CheckerResult(
+            num_fulfillments=response.num_fulfillments,
+            num_violations=response.num_violations,
+            num_pendings=None,
+            num_activations=response.num_activations,
+            state=TraceState.VIOLATED
+            if response.state == TraceState.VIOLATED
+            or precedence.state == TraceState.VIOLATED
+            else TraceState.SATISFIED,
+        )
+
+    return check
+
+
+# Checker of each template. The templates are equal as strings, so they cannot be
+# looked up in a dict and are compared by identity instead.
+_TEMPLATE_CHECKERS = (
+    (Template.EXISTENCE, mp_existence),
+    (Template.ABSENCE, mp_absence),
+    (Template.INIT, mp_init),
+    (Template.END, mp_end),
+    (Template.EXACTLY, mp_exactly),
+    (Template.CHOICE, mp_choice),
+    (Template.EXCLUSIVE_CHOICE, mp_exclusive_choice),
+    (Template.RESPONDED_EXISTENCE, mp_responded_existence),
+    (Template.RESPONSE, mp_response),
+    (Template.ALTERNATE_RESPONSE, mp_alternate_response),
+    (Template.CHAIN_RESPONSE, mp_chain_response),
+    (Template.PRECEDENCE, mp_precedence),
+    (Template.ALTERNATE_PRECEDENCE, mp_alternate_precedence),
+    (Template.CHAIN_PRECEDENCE, mp_chain_precedence),
+    (Template.SUCCESSION, _combined(mp_response, mp_precedence)),
+    (
+        Template.ALTERNATE_SUCCESSION,
+        _combined(mp_alternate_response, mp_alternate_precedence),
+    ),
+    (Template.CHAIN_SUCCESSION, _combined(mp_chain_response, mp_chain_precedence)),
+    (Template.NOT_RESPONDED_EXISTENCE, mp_not_responded_existence),
+    (Template.NOT_CO_EXISTENCE, mp_not_responded_existence),
+    (Template.NOT_RESPONSE, mp_not_response),
+    (Template.NOT_CHAIN_RESPONSE, mp_not_chain_response),
+    (Template.NOT_PRECEDENCE, mp_not_precedence),
+    (Template.NOT_CHAIN_PRECEDENCE, mp_not_chain_precedence),
+)
+
+
+def _bind(checker, activities: tuple, rules: dict):
+    def check(trace) -> CheckerResult:
+        return checker(trace, True, *activities, rules)
 
-    trace_results = {}
+    return check
 
+
+def _constraint_key(constraint) -> tuple:
+    template = constraint["template"]
+    return (
+        template.templ_str,
+        tuple(constraint["activities"]),
+        tuple(constraint["condition"]),
+        constraint["n"] if template.supports_cardinality else None,
+    )
+
+
+def bind_model(model: DeclModel, consider_vacuity: bool) -> list[tuple[str, Callable]]:
+    """
+    Return the serialized constraints of a model, each with a checker that takes a
+    trace and returns its `CheckerResult`. The checkers carry the activities, the
+    cardinality and the compiled conditions of their constraint and are cached on the
+    model. The cache is keyed on the contents of the constraints, so constraints that
+    are added, replaced or edited in place are bound again. Constraints with badly
+    formatted conditions and templates without a checker are left out.
+    """
+    key = (
+        tuple(model.serialized_constraints),
+        tuple(map(_constraint_key, model.constraints)),
+    )
+    cached = model.bound_checkers.get(consider_vacuity)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    checkers = []
     for idx, constraint in enumerate(model.constraints):
         constraint_str = model.serialized_constraints[idx]
-        rules["activation"] = constraint["condition"][0]
+        template = constraint["template"]
+        checker = next(
+            (checker for (t, checker) in _TEMPLATE_CHECKERS if t is template), None
+        )
+        if checker is None:
+            continue
 
-        if constraint["template"].supports_cardinality:
+        rules = {"vacuous_satisfaction": consider_vacuity}
+        if template.supports_cardinality:
             rules["n"] = constraint["n"]
-        if constraint["template"].is_binary:
-            rules["correlation"] = constraint["condition"][1]
-
-        rules["time"] = constraint["condition"][
-            -1
-        ]  # time condition is always at last position
-
         try:
-            if constraint["template"] is Template.EXISTENCE:
-                trace_results[constraint_str] = mp_existence(
-                    trace, True, constraint["activities"][0], rules
-                )
-
-            elif constraint["template"] is Template.ABSENCE:
-                trace_results[constraint_str] = mp_absence(
-                    trace, True, constraint["activities"][0], rules
-                )
-
-            elif constraint["template"] is Template.INIT:
-                trace_results[constraint_str] = mp_init(
-                    trace, True, constraint["activities"][0], rules
-                )
-
-            elif constraint["template"] is Template.END:
-                trace_results[constraint_str] = mp_end(
-                    trace, True, constraint["activities"][0], rules
-                )
-
-            elif constraint["template"] is Template.EXACTLY:
-                trace_results[constraint_str] = mp_exactly(
-                    trace, True, constraint["activities"][0], rules
-                )
-
-            elif constraint["template"] is Template.CHOICE:
-                trace_results[constraint_str] = mp_choice(
-                    trace,
-                    True,
-                    constraint["activities"][0],
-                    constraint["activities"][1],
-                    rules,
-                )
-
-            elif constraint["template"] is Template.EXCLUSIVE_CHOICE:
-                trace_results[constraint_str] = mp_exclusive_choice(
-                    trace,
-                    True,
-                    constraint["activities"][0],
-                    constraint["activities"][1],
-                    rules,
-                )
-
-            elif constraint["template"] is Template.RESPONDED_EXISTENCE:
-                trace_results[constraint_str] = mp_responded_existence(
-                    trace,
-                    True,
-                    constraint["activities"][0],
-                    constraint["activities"][1],
-                    rules,
-                )
-
-            elif constraint["template"] is Template.RESPONSE:
-                trace_results[constraint_str] = mp_response(
-                    trace,
-                    True,
-                    constraint["activities"][0],
-                    constraint["activities"][1],
-                    rules,
-                )
-
-            elif constraint["template"] is Template.ALTERNATE_RESPONSE:
-                trace_results[constraint_str] = mp_alternate_response(
-                    trace,
-                    True,
-                    constraint["activities"][0],
-                    constraint["activities"][1],
-                    rules,
-                )
-
-            elif constraint["template"] is Template.CHAIN_RESPONSE:
-                trace_results[constraint_str] = mp_chain_response(
-                    trace,
-                    True,
-                    constraint["activities"][0],
-                    constraint["activities"][1],
-                    rules,
-                )
-
-            elif constraint["template"] is Template.PRECEDENCE:
-                trace_results[constraint_str] = mp_precedence(
-                    trace,
-                    True,
-                    constraint["activities"][0],
-                    constraint["activities"][1],
-                    rules,
-                )
-
-            elif constraint["template"] is Template.ALTERNATE_PRECEDENCE:
-                trace_results[constraint_str] = mp_alternate_precedence(
-                    trace,
-                    True,
-                    constraint["activities"][0],
-                    constraint["activities"][1],
-                    rules,
-                )
-
-            elif constraint["template"] is Template.CHAIN_PRECEDENCE:
-                trace_results[constraint_str] = mp_chain_precedence(
-                    trace,
-                    True,
-                    constraint["activities"][0],
-                    constraint["activities"][1],
-                    rules,
-                )
-            elif constraint["template"] is Template.SUCCESSION:
-                trace_results_response = mp_response(
-                    trace,
-                    True,
-                    constraint["activities"][0],
-                    constraint["activities"][1],
-                    rules,
-                )
-                trace_results_precedence = mp_precedence(
-                    trace,
-                    True,
-                    constraint["activities"][0],
-                    constraint["activities"][1],
-                    rules,
-                )
-                res = CheckerResult(
-                    num_fulfillments=trace_results_response.num_fulfillments,
-                    num_violations=trace_results_response.num_violations,
-                    num_pendings=None,
-                    num_activations=trace_results_response.num_activations,
-                    state=TraceState.VIOLATED
-                    if trace_results_response.state == TraceState.VIOLATED
-                    or trace_results_precedence.state == TraceState.VIOLATED
-                    else TraceState.SATISFIED,
-                )
-                trace_results[constraint_str] = res
-
-            elif constraint["template"] is Template.ALTERNATE_SUCCESSION:
-                trace_results_response = mp_alternate_response(
-                    trace,
-                    True,
-                    constraint["activities"][0],
-                    constraint["activities"][1],
-                    rules,
-                )
-                trace_results_precedence = mp_alternate_precedence(
-                    trace,
-                    True,
-                    constraint["activities"][0],
-                    constraint["activities"][1],
-                    rules,
-                )
-                res = CheckerResult(
-                    num_fulfillments=trace_results_response.num_fulfillments,
-                    num_violations=trace_results_response.num_violations,
-                    num_pendings=None,
-                    num_activations=trace_results_response.num_activations,
-                    state=TraceState.VIOLATED
-                    if trace_results_response.state == TraceState.VIOLATED
-                    or trace_results_precedence.state == TraceState.VIOLATED
-                    else TraceState.SATISFIED,
-                )
-                trace_results[constraint_str] = res
-
-            elif constraint["template"] is Template.CHAIN_SUCCESSION:
-                trace_results_response = mp_chain_response(
-                    trace,
-                    True,
-                    constraint["activities"][0],
-                    constraint["activities"][1],
-                    rules,
-                )
-                trace_results_precedence = mp_chain_precedence(
-                    trace,
-                    True,
-                    constraint["activities"][0],
-                    constraint["activities"][1],
-                    rules,
-                )
-                res = CheckerResult(
-                    num_fulfillments=trace_results_response.num_fulfillments,
-                    num_violations=trace_results_response.num_violations,
-                    num_pendings=None,
-                    num_activations=trace_results_response.num_activations,
-                    state=TraceState.VIOLATED
-                    if trace_results_response.state == TraceState.VIOLATED
-                    or trace_results_precedence.state == TraceState.VIOLATED
-                    else TraceState.SATISFIED,
-                )
-                trace_results[constraint_str] = res
-
-            elif constraint["template"] is Template.NOT_RESPONDED_EXISTENCE:
-                trace_results[constraint_str] = mp_not_responded_existence(
-                    trace,
-                    True,
-                    constraint["activities"][0],
-                    constraint["activities"][1],
-                    rules,
-                )
-            elif constraint["template"] is Template.NOT_CO_EXISTENCE:
-                trace_results[constraint_str] = mp_not_responded_existence(
-                    trace,
-                    True,
-                    constraint["activities"][0],
-                    constraint["activities"][1],
-                    rules,
-                )
-
-            elif constraint["template"] is Template.NOT_RESPONSE:
-                trace_results[constraint_str] = mp_not_response(
-                    trace,
-                    True,
-                    constraint["activities"][0],
-                    constraint["activities"][1],
-                    rules,
-                )
-
-            elif constraint["template"] is Template.NOT_CHAIN_RESPONSE:
-                trace_results[constraint_str] = mp_not_chain_response(
-                    trace,
-                    True,
-                    constraint["activities"][0],
-                    constraint["activities"][1],
-                    rules,
-                )
-
-            elif constraint["template"] is Template.NOT_PRECEDENCE:
-                trace_results[constraint_str] = mp_not_precedence(
-                    trace,
-                    True,
-                    constraint["activities"][0],
-                    constraint["activities"][1],
-                    rules,
-                )
-
-            elif constraint["template"] is Template.NOT_CHAIN_PRECEDENCE:
-                trace_results[constraint_str] = mp_not_chain_precedence(
-                    trace,
-                    True,
-                    constraint["activities"][0],
-                    constraint["activities"][1],
-                    rules,
-                )
+            rules.update(compiled_conditions(model, constraint))
         except SyntaxError:
-            if constraint_str not in error_constraint_set:
-                error_constraint_set.add(constraint_str)
-                print(
-                    'Condition not properly formatted for constraint "'
-                    + constraint_str
-                    + '".'
-                )
+            print(
+                'Condition not properly formatted for constraint "'
+                + constraint_str
+                + '".'
+            )
+            continue
+        activities = tuple(constraint["activities"][: 2 if template.is_binary else 1])
+        checkers.append((constraint_str, _bind(checker, activities, rules)))
+    model.bound_checkers[consider_vacuity] = (key, checkers)
+    return checkers
+
+
+def check_trace_conformance(trace, model, consider_vacuity):
+    """
+    Check the conformance of a trace with a model.
+    TODO currently trace is an activity sequence only (no event)
+    """
+    return {
+        constraint_str: check(trace)
+        for constraint_str, check in bind_model(model, consider_vacuity)
+    }
 
-    return trace_results
+
+def check_traces_conformance(
+    traces: Iterable, model: DeclModel, consider_vacuity: bool
+) -> ConformanceMatrix:
+    """
+    Check the conformance of many traces, e.g. the variants of `EventLog.trace_variants`,
+    with a model. The results are collected in a `ConformanceMatrix` with one row per
+    trace instead of a dict of `CheckerResult`s per trace.
+    """
+    checkers = bind_model(model, consider_vacuity)
+    traces = list(traces)
+    shape = (len(traces), len(checkers))
+    states = np.full(shape, -1, dtype=np.int8)
+    counts = {
+        name: np.full(shape, -1, dtype=np.int64)
+        for name in (
+            "num_fulfillments",
+            "num_violations",
+            "num_pendings",
+            "num_activations",
+        )
+    }
+    state_codes = {state: code for code, state in enumerate(STATES)}
+    for row, trace in enumerate(traces):
+        for column, (_, check) in enumerate(checkers):
+            result = check(trace)
+            if result.state is not None:
+                states[row, column] = state_codes[result.state]
+            for name, matrix in counts.items():
+                value = getattr(result, name)
+                if value is not None:
+                    matrix[row, column] = value
+    return ConformanceMatrix(
+        constraints=[constraint_str for constraint_str, _ in checkers],
+        states=states,
+        **counts,
+    )
 
 
 def discover_constraint(log: EventLog, constraint, consider_vacuity):
@@ -339,6 +268,7 @@ def query_constraint(log, constraint, consider_vacuity, min_support):
     # Fake model composed by a single constraint
     model = DeclModel()
     model.constraints.append(constraint)
+    model.set_constraints()
 
     sat_ctr = 0
     for i, trace in enumerate(log):
@@ -0,0 +1,213 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix, diags
+
+from process_atoms.models.column_types import EventType
+from process_atoms.models.event_log import EventLog
+
+# Maximum number of nonzero entries of a block of candidates in
+# `BinaryLogEncoding.frequent_itemsets`
+_BLOCK_SIZE = 1 << 20
+
+
+@dataclass
+class BinaryLogEncoding:
+    """
+    Sparse binary encoding of the trace variants of a log, i.e. which activities occur
+    in each variant, together with the number of cases of each variant.
+
+    The activities are sorted by their labels. The activities of variant `i` are
+    `indices[indptr[i]:indptr[i + 1]]` in ascending order, as in a CSR matrix. The
+    memory needed is proportional to the number of distinct activities of the variants
+    instead of the number of cases times the number of activities.
+    """
+
+    activities: list[str]
+    indptr: np.ndarray
+    indices: np.ndarray
+    # Number of cases of each variant
+    weights: np.ndarray
+
+    @classmethod
+    def from_log(cls, log: EventLog) -> "BinaryLogEncoding":
+        """Encode the variants of `log` from its categorical activity codes."""
+        _, labels = log._codes(EventType)
+        index = log.variant_index
+        codes = np.unique(index.codes)
+        order = np.argsort(labels[codes], kind="stable")
+        columns = np.full(len(labels), -1, dtype=np.int64)
+        columns[codes[order]] = np.arange(len(codes))
+
+        # the occurring (variant, activity) cells in row-major order
+        variants = np.repeat(
+            np.arange(len(index), dtype=np.int64), np.diff(index.offsets)
+        )
+        cells = np.unique(variants * len(codes) + columns[index.codes])
+        rows, indices = np.divmod(cells, len(codes))
+        indptr = np.zeros(len(index) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(index)), out=indptr[1:])
+        return cls(
+            activities=labels[codes[order]].tolist(),
+            indptr=indptr,
+            indices=indices.astype(np.int32),
+            weights=index.counts.astype(np.int64),
+        )
+
+    def __len__(self):
+        return len(self.weights)
+
+    @property
+    def nbytes(self) -> int:
+        return self.indptr.nbytes + self.indices.nbytes + self.weights.nbytes
+
+    def matrix(self) -> csr_matrix:
+        """Return the encoding as a sparse variants x activities matrix of ones."""
+        return csr_matrix(
+            (np.ones(len(self.indices), dtype=np.int8), self.indices, self.indptr),
+            shape=(len(self), len(self.activities)),
+        )
+
+    def to_frame(self, rows: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """
+        Return the encoding as a dense boolean DataFrame with one column per activity,
+        like `mlxtend.preprocessing.TransactionEncoder`. By default there is one row
+        per variant; with `rows`, row `i` is the variant `rows[i]`, e.g. one row per
+        case for `EventLog.variant_index.case_variants`.
+        """
+        matrix = self.matrix()
+        if rows is not None:
+            matrix = matrix[rows]
+        return pd.DataFrame(matrix.toarray().astype(bool), columns=self.activities)
+
+    def frequent_itemsets(
+        self, min_support: float, max_len: Optional[int] = None
+    ) -> pd.DataFrame:
+        """
+        Find the item sets of activities with a support of at least `min_support` with
+        the apriori algorithm, weighting every variant by its number of cases.
+
+        The supports of the candidates of each level are counted on the sparse columns
+        of the frequent activities, in blocks of at most `_BLOCK_SIZE // len(self)`
+        candidates. Each block holds at most `_BLOCK_SIZE` nonzero entries, so besides
+        the encoding itself at most a few blocks of about 5 MiB are held at a time.
+
+        Returns:
+            pd.DataFrame: The columns `support` and `itemsets` as returned by
+            `mlxtend.frequent_patterns.apriori`, in the same order: by length and then
+            in the order of the combinations of the activities sorted by label.
+        """
+        num_cases = self.weights.sum()
+        support = self._activity_counts() / num_cases
+        frequent = np.flatnonzero(support >= min_support)
+        supports = [support[frequent]]
+        itemsets = [[(i,) for i in range(len(frequent))]]
+
+        occurs = self.matrix().tocsc()[:, frequent]
+        block_size = max(1, _BLOCK_SIZE // max(len(self), 1))
+        while itemsets[-1] and (max_len is None or len(itemsets[-1][0]) < max_len):
+            candidates = _join(itemsets[-1])
+            if not candidates:
+                break
+            combinations = np.array(candidates)
+            counts = np.concatenate(
+                [
+                    self._count(occurs, combinations[start : start + block_size])
+                    for start in range(0, len(combinations), block_size)
+                ]
+            )
+            support = counts / num_cases
+            is_frequent = support >= min_support
+            if not is_frequent.any():
+                break
+            supports.append(support[is_frequent])
+            itemsets.append(
+                [c for (c, keep) in zip(candidates, is_frequent.tolist()) if keep]
+            )
+
+        labels = [self.activities[i] for i in frequent]
+        return _frame(
+            np.concatenate(supports),
+            [
+                frozenset(labels[i] for i in itemset)
+                for level in itemsets
+                for itemset in level
+            ],
+        )
+
+    def frequent_pairs(self, min_support: float) -> pd.DataFrame:
+        """
+        Find the item sets of one or two activities with a support of at least
+        `min_support`, like `frequent_itemsets` with `max_len=2`. The supports of all
+        pairs of frequent activities are computed at once as the sparse product
+        `O.T @ diag(weights) @ O` of the occurrence matrix `O` of the frequent
+        activities, so only the nonzero entries of `O` and the small matrix of pair
+        counts are held.
+        """
+        num_cases = self.weights.sum()
+        support = self._activity_counts() / num_cases
+        frequent = np.flatnonzero(support >= min_support)
+        occurs = self.matrix().tocsc()[:, frequent]
+        pair_counts = occurs.T @ (diags(self.weights, dtype=np.int64) @ occurs)
+        pair_support = pair_counts.toarray() / num_cases
+        # the pairs in the order of their combinations
+        first, second = np.triu_indices(len(frequent), k=1)
+        is_frequent = pair_support[first, second] >= min_support
+        first, second = first[is_frequent], second[is_frequent]
+
+        labels = [self.activities[i] for i in frequent]
+        return _frame(
+            np.concatenate([support[frequent], pair_support[first, second]]),
+            [frozenset([label]) for label in labels]
+            + [
+                frozenset([labels[i], labels[j]])
+                for i, j in zip(first.tolist(), second.tolist())
+            ],
+        )
+
+    def _count(self, occurs, combinations: np.ndarray) -> np.ndarray:
+        """
+        Return the number of cases in which all activities of each of `combinations`
+        occur, given the occurrence columns `occurs` that the combinations refer to.
+        """
+        contains = occurs[:, combinations[:, 0]]
+        for column in combinations[:, 1:].T:
+            contains = contains.multiply(occurs[:, column])
+        return np.asarray(contains.T @ self.weights, dtype=np.int64)
+
+    def _activity_counts(self) -> np.ndarray:
+        """Return the number of cases in which each activity occurs."""
+        return np.bincount(
+            self.indices,
+            weights=np.repeat(self.weights, np.diff(self.indptr)),
+            minlength=len(self.activities),
+        ).astype(np.int64)
+
+
+def _frame(supports: np.ndarray, itemsets: list[frozenset]) -> pd.DataFrame:
+    return pd.DataFrame(
+        {"support": supports, "itemsets": pd.Series(itemsets, dtype=object)}
+    )
+
+
+def _join(itemsets: list[tuple[int, ...]]) -> list[tuple[int, ...]]:
+    """
+    Return the candidate item sets of the next apriori level: the unions of two sorted
+    item sets that share all but their last item, of which all subsets are frequent.
+    """
+    frequent = set(itemsets)
+    candidates = []
+    for i, first in enumerate(itemsets):
+        for second in itemsets[i + 1 :]:
+            if first[:-1] != second[:-1]:
+                break
+            candidate = first + second[-1:]
+            # the subsets without one of the last two items are `first` and `second`
+            if all(
+                candidate[:j] + candidate[j + 1 :] in frequent
+                for j in range(len(candidate) - 2)
+            ):
+                candidates.append(candidate)
+    return candidates
@@ -0,0 +1,55 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from process_atoms.mine.declare.enums.mp_constants import TraceState
+from process_atoms.mine.declare.models.checker_result import CheckerResult
+
+# States in the order of their codes in `ConformanceMatrix.states`. The code -1 stands
+# for a missing state.
+STATES = (
+    TraceState.VIOLATED,
+    TraceState.SATISFIED,
+    TraceState.POSSIBLY_VIOLATED,
+    TraceState.POSSIBLY_SATISFIED,
+)
+
+
+@dataclass
+class ConformanceMatrix:
+    """
+    The results of checking many traces against a model, with one row per trace and one
+    column per constraint. Counts that a checker does not compute are -1.
+    """
+
+    # Serialized constraints of the columns
+    constraints: list[str]
+    # Codes of the states, see `STATES`
+    states: np.ndarray
+    num_fulfillments: np.ndarray
+    num_violations: np.ndarray
+    num_pendings: np.ndarray
+    num_activations: np.ndarray
+
+    def __len__(self):
+        return len(self.states)
+
+    def violated(self, row: int) -> set[str]:
+        """Return the constraints that the trace of `row` violates."""
+        violated = np.flatnonzero(self.states[row] == STATES.index(TraceState.VIOLATED))
+        return {self.constraints[column] for column in violated}
+
+    def result(self, row: int, column: int) -> CheckerResult:
+        """Return the result of the trace of `row` for the constraint of `column`."""
+
+        def count(counts: np.ndarray):
+            return None if counts[row, column] < 0 else int(counts[row, column])
+
+        code = self.states[row, column]
+        return CheckerResult(
+            num_fulfillments=count(self.num_fulfillments),
+            num_violations=count(self.num_violations),
+            num_pendings=count(self.num_pendings),
+            num_activations=count(self.num_activations),
+            state=None if code < 0 else STATES[code],
+        )
@@ -3,8 +3,13 @@ class DeclModel(object):
         self.activities = []
         self.serialized_constraints = []
         self.constraints = []
+        # Compiled conditions of the constraints and the checkers bound for each
+        # vacuity setting, see `functions.compiled_conditions` and `functions.bind_model`
+        self.compiled_conditions = {}
+        self.bound_checkers = {}
 
     def set_constraints(self):
+        self.bound_checkers = {}
         if len(self.constraints) > 0:
             for constraint in self.constraints:
                 constraint_str = constraint["template"].templ_str
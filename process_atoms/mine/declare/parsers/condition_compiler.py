@@ -0,0 +1,298 @@
+"""
+Compilation of MP-Declare conditions into Python closures.
+
+`parse_data_cond` and `parse_time_cond` translate conditions into Python expressions
+over the activation `A` and the target `T`. Instead of evaluating these expressions with
+`eval` for every event, they are compiled once into nested closures. Only the subset
+of Python that the parsers produce is supported: constants, tuples, `A`, `T`, boolean
+operators, comparisons, arithmetic, subscripts and calls of `timedelta`, `abs` and
+`float`. The trivial condition `True` compiles to `None`, so that the checkers can skip
+its evaluation.
+"""
+
+import ast
+import operator
+from datetime import timedelta
+from typing import Any, Callable, Optional, Union
+
+from process_atoms.mine.declare.parsers.decl_parser import (
+    parse_data_cond,
+    parse_time_cond,
+)
+
+# A compiled condition, called with the activation and (for correlation and time
+# conditions) the target event
+Predicate = Callable[..., Any]
+# A compiled expression, called with the activation and the target event
+_Expression = Callable[[Any, Any], Any]
+
+_FUNCTIONS = {"timedelta": timedelta, "abs": abs, "float": float}
+
+_UNARY_OPERATORS = {
+    ast.Not: operator.not_,
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+
+_BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Mod: operator.mod,
+}
+
+_COMPARISONS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.In: lambda a, b: a in b,
+    ast.NotIn: lambda a, b: a not in b,
+    ast.Is: operator.is_,
+    ast.IsNot: operator.is_not,
+}
+
+# Value of `T` when a condition is evaluated on the activation only
+_UNBOUND = object()
+
+
+def _target(A, T):
+    if T is _UNBOUND:
+        raise NameError("name 'T' is not defined")
+    return T
+
+
+def _undefined(name: str) -> _Expression:
+    def evaluate(A, T):
+        raise NameError(f"name '{name}' is not defined")
+
+    return evaluate
+
+
+def _compile_node(node: ast.AST) -> _Expression:
+    if isinstance(node, ast.Expression):
+        return _compile_node(node.body)
+
+    if isinstance(node, ast.Constant):
+        value = node.value
+        return lambda A, T: value
+
+    if isinstance(node, ast.Name):
+        if node.id == "A":
+            return lambda A, T: A
+        if node.id == "T":
+            return _target
+        if node.id in _FUNCTIONS:
+            function = _FUNCTIONS[node.id]
+            return lambda A, T: function
+        return _undefined(node.id)
+
+    if isinstance(node, ast.Tuple):
+        items = [_compile_node(item) for item in node.elts]
+        return lambda A, T: tuple(item(A, T) for item in items)
+
+    if isinstance(node, ast.BoolOp):
+        operands = [_compile_node(operand) for operand in node.values]
+        if isinstance(node.op, ast.And):
+
+            def evaluate(A, T):
+                for operand in operands:
+                    value = operand(A, T)
+                    if not value:
+                        return value
+                return value
+
+        else:
+
+            def evaluate(A, T):
+                for operand in operands:
+                    value = operand(A, T)
+                    if value:
+                        return value
+                return value
+
+        return evaluate
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPERATORS:
+        unary_operator = _UNARY_OPERATORS[type(node.op)]
+        operand = _compile_node(node.operand)
+        return lambda A, T: unary_operator(operand(A, T))
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+        binary_operator = _BINARY_OPERATORS[type(node.op)]
+        left, right = _compile_node(node.left), _compile_node(node.right)
+        return lambda A, T: binary_operator(left(A, T), right(A, T))
+
+    if isinstance(node, ast.Compare) and all(
+        type(op) in _COMPARISONS for op in node.ops
+    ):
+        first = _compile_node(node.left)
+        comparisons = [
+            (_COMPARISONS[type(op)], _compile_node(comparator))
+            for op, comparator in zip(node.ops, node.comparators)
+        ]
+        if len(comparisons) == 1:
+            compare, second = comparisons[0]
+            return lambda A, T: compare(first(A, T), second(A, T))
+
+        def evaluate(A, T):
+            left = first(A, T)
+            for compare, comparator in comparisons:
+                right = comparator(A, T)
+                result = compare(left, right)
+                if not result:
+                    return result
+                left = right
+            return result
+
+        return evaluate
+
+    if isinstance(node, ast.Subscript):
+        value, key = _compile_node(node.value), _compile_node(node.slice)
+        return lambda A, T: value(A, T)[key(A, T)]
+
+    if (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Name)
+        and node.func.id in _FUNCTIONS
+    ):
+        function = _FUNCTIONS[node.func.id]
+        args = [_compile_node(arg) for arg in node.args]
+        kwargs = {kw.arg: _compile_node(kw.value) for kw in node.keywords}
+        return lambda A, T: function(
+            *(arg(A, T) for arg in args),
+            **{name: kwarg(A, T) for name, kwarg in kwargs.items()},
+        )
+
+    raise SyntaxError(f"Unsupported expression `{ast.unparse(node)}` in condition")
+
+
+def _conjuncts(node: ast.AST) -> list[ast.AST]:
+    if isinstance(node, ast.BoolOp) and isinstance(node.op, ast.And):
+        return [conjunct for value in node.values for conjunct in _conjuncts(value)]
+    return [node]
+
+
+def _attribute(node: ast.AST) -> Optional[tuple[str, str]]:
+    """Return the event and the attribute of a subscript like `A["x"]`."""
+    if (
+        isinstance(node, ast.Subscript)
+        and isinstance(node.value, ast.Name)
+        and isinstance(node.slice, ast.Constant)
+        and isinstance(node.slice.value, str)
+    ):
+        return node.value.id, node.slice.value
+    return None
+
+
+def _same_attributes(node: ast.AST) -> Optional[tuple[str, ...]]:
+    """
+    Return the attributes of a correlation condition that only consists of `same`
+    conditions, i.e. a conjunction of `"x" in A and "x" in T and A["x"] == T["x"]` as
+    produced by `parse_data_cond`. Return `None` for any other condition.
+    """
+    guards, attributes = set(), []
+    for conjunct in _conjuncts(node):
+        if not (isinstance(conjunct, ast.Compare) and len(conjunct.ops) == 1):
+            return None
+        left, right = conjunct.left, conjunct.comparators[0]
+        if (
+            isinstance(conjunct.ops[0], ast.In)
+            and isinstance(left, ast.Constant)
+            and isinstance(left.value, str)
+            and isinstance(right, ast.Name)
+        ):
+            guards.add((right.id, left.value))
+        elif (
+            isinstance(conjunct.ops[0], ast.Eq)
+            and _attribute(left)
+            and _attribute(right)
+        ):
+            (first, attribute), (second, other) = _attribute(left), _attribute(right)
+            if {first, second} != {"A", "T"} or attribute != other:
+                return None
+            attributes.append(attribute)
+        else:
+            return None
+    if not attributes or guards != {
+        (event, attribute) for attribute in attributes for event in ("A", "T")
+    }:
+        return None
+    return tuple(dict.fromkeys(attributes))
+
+
+def compile_expression(source: str) -> Optional[Predicate]:
+    """
+    Compile a Python expression as produced by `parse_data_cond` or `parse_time_cond`.
+
+    Returns:
+        Optional[Predicate]: A function of the activation `A` and the optional target
+        `T`, or `None` if the expression is the constant `True`.
+
+    Raises:
+        SyntaxError: If the expression cannot be parsed or uses unsupported syntax.
+    """
+    tree = ast.parse(source.strip(), mode="eval")
+    if isinstance(tree.body, ast.Constant) and tree.body.value is True:
+        return None
+    expression = _compile_node(tree)
+
+    def predicate(A, T=_UNBOUND):
+        return expression(A, T)
+
+    predicate.same_attributes = _same_attributes(tree.body)
+    return predicate
+
+
+def compile_data_condition(condition: str) -> Optional[Predicate]:
+    """Compile an activation or correlation condition, see `compile_expression`."""
+    return compile_expression(parse_data_cond(condition))
+
+
+def compile_time_condition(condition: str) -> Optional[Predicate]:
+    """Compile a time condition, see `compile_expression`."""
+    return compile_expression(parse_time_cond(condition))
+
+
+def data_predicate(condition: Union[str, Predicate, None]) -> Optional[Predicate]:
+    """Compile a data condition unless it is compiled already."""
+    if isinstance(condition, str):
+        return compile_data_condition(condition)
+    return condition
+
+
+def time_predicate(condition: Union[str, Predicate, None]) -> Optional[Predicate]:
+    """Compile a time condition unless it is compiled already."""
+    if isinstance(condition, str):
+        return compile_time_condition(condition)
+    return condition
+
+
+def same_attributes(predicate: Optional[Predicate]) -> Optional[tuple[str, ...]]:
+    """
+    Return the attributes of which a compiled correlation condition requires the same
+    values for the activation and the target, if it consists of `same` conditions only.
+    A target then fulfills exactly the activations that have the same values of these
+    attributes, so the activations can be looked up by these values.
+    """
+    return getattr(predicate, "same_attributes", None)
+
+
+def conjunction(*predicates: Optional[Predicate]) -> Optional[Predicate]:
+    """
+    Return a predicate that holds if all `predicates` hold. Trivial predicates (`None`)
+    are left out, and `None` is returned if all of them are trivial.
+    """
+    predicates = [predicate for predicate in predicates if predicate is not None]
+    if not predicates:
+        return None
+    if len(predicates) == 1:
+        return predicates[0]
+
+    def all_hold(A, T=_UNBOUND):
+        return all(predicate(A, T) for predicate in predicates)
+
+    return all_hold
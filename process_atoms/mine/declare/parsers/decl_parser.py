@@ -4,6 +4,12 @@ from process_atoms.mine.declare.enums.mp_constants import Template
 from process_atoms.mine.declare.models.decl_model import DeclModel
 
 
+def _ends_operand(cond: str) -> bool:
+    """Return whether `cond` starts with a closing parenthesis or a connective."""
+    word = re.split(r"[\s()]+", cond)[0]
+    return cond.startswith(")") or word.lower() in ("and", "or")
+
+
 def parse_data_cond(cond):
     try:
         cond = cond.strip()
@@ -48,11 +54,7 @@ def parse_data_cond(cond):
                             py_cond = py_cond + " =="
 
                         tmp = []
-                        while cond and not (
-                            cond.startswith(")")
-                            or cond.lower().startswith("and")
-                            or cond.lower().startswith("or")
-                        ):
+                        while cond and not _ends_operand(cond):
                             w = re.split(r"[\s()]+", cond)[0]
                             cond = cond[len(w) :].lstrip()
                             tmp.append(w)
@@ -68,11 +70,7 @@ def parse_data_cond(cond):
 
                     elif next_word.lower() == "same":
                         tmp = []
-                        while cond and not (
-                            cond.startswith(")")
-                            or cond.lower().startswith("and")
-                            or cond.lower().startswith("or")
-                        ):
+                        while cond and not _ends_operand(cond):
                             w = re.split(r"[\s()]+", cond)[0]
                             cond = cond[len(w) :].lstrip()
                             tmp.append(w)
@@ -80,11 +78,11 @@ def parse_data_cond(cond):
                         attr = " ".join(tmp)
                         py_cond = (
                             py_cond
-                            + " "
+                            + ' "'
                             + attr
-                            + " in A and "
+                            + '" in A and "'
                             + attr
-                            + " in T "
+                            + '" in T '
                             + 'and A["'
                             + attr
                             + '"] == T["'
@@ -94,11 +92,7 @@ def parse_data_cond(cond):
 
                     elif next_word.lower() == "different":
                         tmp = []
-                        while cond and not (
-                            cond.startswith(")")
-                            or cond.lower().startswith("and")
-                            or cond.lower().startswith("or")
-                        ):
+                        while cond and not _ends_operand(cond):
                             w = re.split(r"[\s()]+", cond)[0]
                             cond = cond[len(w) :].lstrip()
                             tmp.append(w)
@@ -106,11 +100,11 @@ def parse_data_cond(cond):
                         attr = " ".join(tmp)
                         py_cond = (
                             py_cond
-                            + " "
+                            + ' "'
                             + attr
-                            + " in A and "
+                            + '" in A and "'
                             + attr
-                            + " in T "
+                            + '" in T '
                             + 'and A["'
                             + attr
                             + '"] != T["'
@@ -1,21 +1,32 @@
-import string
-from typing import List
+import multiprocessing
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, List
 from uuid import uuid4
 
+import numpy as np
 import re2 as re
-from pandas import DataFrame
+from pandas import DataFrame, Index, Series
 from tqdm import tqdm
 
+from process_atoms.mine.declare.automaton import AutomataBatch, compile_regex
 from process_atoms.mine.declare.declare import Declare
 from process_atoms.mine.declare.enums.mp_constants import (
     Template,
     activation_based_on,
     binary_strings,
+    subsumption_hierarchy,
     supports_cardinality,
     unary_strings,
 )
 from process_atoms.models.event_log import EventLog
 from process_atoms.models.processatom import ProcessAtom
+from process_atoms.models.variant_encoding import (
+    OccurrenceIndex,
+    VariantCases,
+    VariantEncoding,
+)
 from process_atoms.models.violation import Violation
 from process_atoms.signalquerybuilder import SignalQueryBuilder
 
@@ -51,16 +62,71 @@ regex_representations = {
     Template.NOT_CO_EXISTENCE.templ_str: "^[^ab]*((a[^b]*)|(b[^a]*))?$",
 }
 
+# Families of templates that imply each other for the same operands and are activated by
+# the same operands. Ordered by `subsumption_hierarchy`, each template maps to the next
+# weaker template of its family.
+subsumption_families = [
+    [
+        Template.RESPONDED_EXISTENCE.templ_str,
+        Template.RESPONSE.templ_str,
+        Template.ALTERNATE_RESPONSE.templ_str,
+        Template.CHAIN_RESPONSE.templ_str,
+    ],
+    [
+        Template.PRECEDENCE.templ_str,
+        Template.ALTERNATE_PRECEDENCE.templ_str,
+        Template.CHAIN_PRECEDENCE.templ_str,
+    ],
+    [
+        Template.CO_EXISTENCE.templ_str,
+        Template.SUCCESSION.templ_str,
+        Template.ALTERNATE_SUCCESSION.templ_str,
+        Template.CHAIN_SUCCESSION.templ_str,
+    ],
+    [Template.NOT_SUCCESSION.templ_str, Template.NOT_CO_EXISTENCE.templ_str],
+]
+weaker_templates = {}
+for family in subsumption_families:
+    family = sorted(family, key=subsumption_hierarchy.get)
+    weaker_templates.update(zip(family, family[1:]))
+
+# Templates that can only be satisfied by an activated case if both operands occur in it
+co_occurrence_templates = {
+    template for family in subsumption_families[:3] for template in family
+}
+
 
-def is_activated(templ_str, a, b, string: str):
+def is_activated(
+    templ_str, occurrences: OccurrenceIndex, a_ids: list[int], b_ids: list[int]
+) -> np.ndarray:
     if activation_based_on[templ_str] == [0]:
-        act = string.find(a) != -1
-        return act
+        return occurrences.occurs(a_ids)
     elif activation_based_on[templ_str] == [1]:
-        return string.find(b) != -1
+        return occurrences.occurs(b_ids)
     elif activation_based_on[templ_str] == [0, 1]:
-        return string.find(a) != -1 or string.find(b) != -1
-    return True
+        return occurrences.occurs(a_ids) | occurrences.occurs(b_ids)
+    return np.ones(len(occurrences.lengths), dtype=bool)
+
+
+def check_unary_occurrences(
+    templ_str, occurrences: OccurrenceIndex, a_ids: list[int], m, n
+) -> np.ndarray:
+    """
+    Check the unary templates on the occurrence index instead of running their regexes.
+    The semantics are the same as those of `regex_representations`.
+    """
+    if templ_str == Template.ABSENCE.templ_str:
+        return occurrences.count(a_ids) <= m
+    if templ_str == Template.EXISTENCE.templ_str:
+        return occurrences.count(a_ids) >= n
+    if templ_str == Template.EXACTLY.templ_str:
+        # the regex of `Exactly` does not bound the number of occurrences by `n`
+        return occurrences.count(a_ids) >= 1
+    if templ_str == Template.INIT.templ_str:
+        return occurrences.starts_with(a_ids)
+    if templ_str == Template.END.templ_str:
+        return occurrences.ends_with(a_ids)
+    raise KeyError(templ_str)
 
 
 def instantiate_unary_regex(templ_str, a: str, m, n):
@@ -77,11 +143,90 @@ def instantiate_binary_regex(templ_str, a: str, b: str):
     return res
 
 
-def replace_with_hierarchy(activity, string, event_hierarchy, activity_map):
-    for low, high in event_hierarchy.items():
-        if low in activity_map and high == activity:
-            string = string.replace(activity_map[low], activity_map[high])
-    return string
+class RegexCache:
+    """
+    Bounded LRU cache of the compiled patterns of `RegexChecker.check_unary_regex` and
+    `RegexChecker.check_binary_regex`.
+
+    Patterns are keyed by the template, the encoded operands and the cardinalities
+    `m` and `n`, so that repeated calls of these helpers compile each instantiated
+    regex only once per process. Mining does not use regexes but template automata
+    (see `AutomataBatch`), so it neither fills this cache nor counts hits or misses.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._patterns = OrderedDict()
+
+    def get(self, templ_str, a: str, b: str = None, m=None, n=None):
+        key = (templ_str, a, b, m, n)
+        pattern = self._patterns.get(key)
+        if pattern is not None:
+            self.hits += 1
+            self._patterns.move_to_end(key)
+            return pattern
+        self.misses += 1
+        if b is None:
+            regx = instantiate_unary_regex(templ_str, a, m, n)
+        else:
+            regx = instantiate_binary_regex(templ_str, a, b)
+        pattern = re.compile(regx)
+        self._patterns[key] = pattern
+        if len(self._patterns) > self.maxsize:
+            self._patterns.popitem(last=False)
+        return pattern
+
+    def info(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._patterns),
+            "maxsize": self.maxsize,
+        }
+
+    def clear(self):
+        self._patterns.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+regex_cache = RegexCache()
+
+
+def full_match(pattern, string: str) -> bool:
+    match = pattern.search(string)
+    if match:
+        return match.span() == (0, len(string))
+    return False
+
+
+def match_variants(pattern, strings: list[str]) -> np.ndarray:
+    """
+    Run one compiled pattern over all encoded variant strings and return a boolean
+    array that is true for every variant the pattern fully matches.
+    """
+    return np.fromiter(
+        (full_match(pattern, x) for x in strings), dtype=bool, count=len(strings)
+    )
+
+
+# State shared with the worker processes of `RegexChecker.run`. It is set before the
+# workers are forked, so they inherit the variant encoding and the candidates read-only
+# instead of receiving a pickled copy.
+_shared_state = None
+
+
+def _discover_shard(bounds: tuple[int, int]) -> tuple[list[ProcessAtom], int]:
+    checker, candidates, variant_frame, activity_map, kwargs = _shared_state
+    return checker._discover_candidates(
+        candidates[bounds[0] : bounds[1]],
+        variant_frame,
+        activity_map,
+        progress=False,
+        **kwargs,
+    )
 
 
 class RegexChecker:
@@ -91,27 +236,14 @@ class RegexChecker:
         self.d4py = Declare(self.log)
         self.event_hierarchy = event_hierarchy
         self.signal_query_builder = SignalQueryBuilder()
+        self.variant_encoding: VariantEncoding = None
+        self.occurrence_index: OccurrenceIndex = None
+        self.variant_cases: VariantCases = None
+        # Number of candidates that the last call of `run` skipped without checking them
+        self.num_pruned_candidates = 0
 
-    def _map_activities_to_letters(self, activities):
-        # List of single letters A-Z
-        letters = list(string.ascii_uppercase) + list(string.ascii_lowercase[2:])
-
-        # If there are more than 50 activities get all possible combinations of 4 letters
-        if len(activities) > len(letters):
-            letters = [
-                f"{letters[idx1]}a{letters[idx2]}a{letters[idx3]}a{letters[idx4]}"
-                for idx1 in range(len(letters))
-                for idx2 in range(len(letters))
-                for idx3 in range(len(letters))
-                for idx4 in range(len(letters))
-            ]
-
-        # Create a mapping dictionary
-        activity_to_letter = {
-            activity: letters[i] for i, activity in enumerate(activities)
-        }
-
-        return activity_to_letter
+    def _map_activities_to_ids(self, activities) -> dict[str, int]:
+        return {activity: i for i, activity in enumerate(activities)}
 
     def create_variant_frame_with_duration(self, activity_map):
         variant_frame = self.create_variant_frame_from_log(activity_map)
@@ -121,20 +253,119 @@ class RegexChecker:
         return variant_frame
 
     def create_variant_frame_from_log(self, activity_map):
+        """
+        Create a frame with one row per trace variant. The variants are encoded with the
+        activity IDs of `activity_map` and the encoding is kept in
+        `self.variant_encoding`, whose rows correspond to the index of the frame, together
+        with its occurrence index and the cases of each variant (`self.variant_cases`).
+        """
         variants = self.log.trace_variants
         data = {"variant tuple": list(variants.keys())}
         variant_frame = DataFrame(data)
-        variant_frame["enc_variant_string"] = variant_frame["variant tuple"].apply(
-            lambda x: "".join([activity_map[activity] for activity in x])
+        self.variant_encoding = VariantEncoding.from_variants(
+            data["variant tuple"], activity_map
         )
+        self.occurrence_index = self.variant_encoding.occurrence_index()
         variant_frame["variant_frequency"] = variant_frame["variant tuple"].apply(
             lambda x: len(variants[x])
         )
         variant_frame["case_ids"] = variant_frame["variant tuple"].apply(
             lambda x: variants[x]
         )
+        self.variant_cases = VariantCases.from_case_lists(variants.values())
         return variant_frame
 
+    def _operand_ids(self, operands: list[str], activity_map: dict) -> list[list[int]]:
+        """
+        Return the IDs of the activities that count as each operand. With an event
+        hierarchy, the lower-level activities of each operand are renamed to the
+        operand, one operand after the other. An activity that is renamed to the first
+        operand can therefore be renamed again if that operand is itself a lower-level
+        activity of the second one.
+        """
+        if self.event_hierarchy is None:
+            return [[activity_map[operand]] for operand in operands]
+        renamed = {activity: activity for activity in activity_map}
+        for operand in operands:
+            for low, high in self.event_hierarchy.items():
+                if low in activity_map and high == operand:
+                    for activity, current in renamed.items():
+                        if current == low:
+                            renamed[activity] = operand
+        return [
+            [
+                activity_map[activity]
+                for activity, current in renamed.items()
+                if current == operand
+            ]
+            for operand in operands
+        ]
+
+    def _evaluate_atoms(
+        self, specs: list[tuple[str, list[str], int]], activity_map: dict
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Evaluate (candidate) atoms given as (template, operands, cardinality) on all
+        variants of `self.variant_encoding`.
+
+        Activations and the unary templates are answered from the occurrence index. The
+        remaining templates are bound to their automata and checked together in a
+        single sweep over the variants.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Boolean satisfaction and activation matrices
+            of shape (number of variants, number of atoms).
+        """
+        num_variants = len(self.variant_encoding)
+        satisfaction = np.zeros((num_variants, len(specs)), dtype=bool)
+        activation = np.ones((num_variants, len(specs)), dtype=bool)
+        batch = AutomataBatch(self.variant_encoding.num_activities)
+        columns = []
+        for i, (templ_str, operands, cardinality) in enumerate(specs):
+            operand_ids = self._operand_ids(operands, activity_map)
+            if len(operands) == 1:
+                # unary constraints are always activated
+                satisfaction[:, i] = check_unary_occurrences(
+                    templ_str,
+                    self.occurrence_index,
+                    operand_ids[0],
+                    cardinality,
+                    cardinality,
+                )
+                continue
+            activation[:, i] = is_activated(
+                templ_str, self.occurrence_index, operand_ids[0], operand_ids[1]
+            )
+            batch.add(
+                compile_regex(regex_representations[templ_str]),
+                operand_ids[0],
+                operand_ids[1],
+            )
+            columns.append(i)
+        satisfaction[:, columns] = batch.run(
+            self.variant_encoding.codes, self.variant_encoding.offsets
+        )[0]
+        return satisfaction, activation
+
+    def _evaluate_atom(
+        self, process_atom: ProcessAtom, variant_frame: DataFrame, activity_map: dict
+    ) -> tuple[Series, Series]:
+        satisfaction, activation = self._evaluate_atoms(
+            [
+                (
+                    process_atom.atom_type,
+                    process_atom.operands,
+                    process_atom.cardinality,
+                )
+            ],
+            activity_map,
+        )
+        rows = variant_frame.index.to_numpy()
+        return (
+            Series(satisfaction[rows, 0], index=variant_frame.index),
+            Series(activation[rows, 0], index=variant_frame.index),
+        )
+
     def compute_satisfaction(
         self,
         process_atom: ProcessAtom,
@@ -142,111 +373,35 @@ class RegexChecker:
         activity_map: dict,
         consider_vacuity: bool = True,
     ):
-        variant_frame["tmp_enc_variant_string"] = variant_frame["enc_variant_string"]
-        if process_atom.arity == 1:
-            if (
-                self.event_hierarchy is not None
-                and process_atom.operands[0] in self.event_hierarchy.values()
-            ):
-                # print(process_atom.operands[0], self.event_hierarchy.values())
-                variant_frame["tmp_enc_variant_string"] = variant_frame[
-                    "enc_variant_string"
-                ].apply(
-                    lambda x: replace_with_hierarchy(
-                        process_atom.operands[0], x, self.event_hierarchy, activity_map
-                    )
-                )
-            return variant_frame["tmp_enc_variant_string"].apply(
-                lambda x: self.check_unary_regex(
-                    process_atom.atom_type,
-                    activity_map[process_atom.operands[0]],
-                    process_atom.cardinality,
-                    process_atom.cardinality,
-                    x,
-                )
-            )
-        if process_atom.arity == 2:
-            if (
-                self.event_hierarchy is not None
-                and process_atom.operands[0] in self.event_hierarchy.values()
-            ):
-                variant_frame["tmp_enc_variant_string"] = variant_frame[
-                    "enc_variant_string"
-                ].apply(
-                    lambda x: replace_with_hierarchy(
-                        process_atom.operands[0], x, self.event_hierarchy, activity_map
-                    )
-                )
-            if (
-                self.event_hierarchy is not None
-                and process_atom.operands[1] in self.event_hierarchy.values()
-            ):
-                variant_frame["tmp_enc_variant_string"] = variant_frame[
-                    "tmp_enc_variant_string"
-                ].apply(
-                    lambda x: replace_with_hierarchy(
-                        process_atom.operands[1], x, self.event_hierarchy, activity_map
-                    )
-                )
-
-            ds = variant_frame["tmp_enc_variant_string"].apply(
-                lambda x: self.check_binary_regex(
-                    process_atom.atom_type,
-                    activity_map[process_atom.operands[0]],
-                    activity_map[process_atom.operands[1]],
-                    x,
-                )
-            )
-            if not consider_vacuity:
-                return ds & self.compute_activation(
-                    process_atom, variant_frame, activity_map
-                )
-            return ds
-        return None
+        if process_atom.arity not in (1, 2):
+            return None
+        satisfaction, activation = self._evaluate_atom(
+            process_atom, variant_frame, activity_map
+        )
+        if process_atom.arity == 2 and not consider_vacuity:
+            return satisfaction & activation
+        return satisfaction
 
     def compute_activation(
         self, process_atom: ProcessAtom, variant_frame: DataFrame, activity_map: dict
     ):
-        if process_atom.arity == 1:
-            return variant_frame["tmp_enc_variant_string"].apply(
-                lambda x: is_activated(
-                    process_atom.atom_type,
-                    activity_map[process_atom.operands[0]],
-                    None,
-                    x,
-                )
-            )
-        if process_atom.arity == 2:
-            return variant_frame["tmp_enc_variant_string"].apply(
-                lambda x: is_activated(
-                    process_atom.atom_type,
-                    activity_map[process_atom.operands[0]],
-                    activity_map[process_atom.operands[1]],
-                    x,
-                )
-            )
-        return None
+        if process_atom.arity not in (1, 2):
+            return None
+        return self._evaluate_atom(process_atom, variant_frame, activity_map)[1]
 
     def discover_binary(
         self,
         variant_frame: DataFrame,
         item_set: list[str],
         template: str,
-        activity_map: dict[str, str],
+        satisfaction: np.ndarray,
+        activation: np.ndarray,
         consider_vacuity: bool,
         min_support: float,
         atoms: list[ProcessAtom],
     ):
-        variant_frame["activation"] = variant_frame["enc_variant_string"].apply(
-            lambda x: is_activated(
-                template, activity_map[item_set[0]], activity_map[item_set[1]], x
-            )
-        )
-        variant_frame["satisfaction"] = variant_frame["enc_variant_string"].apply(
-            lambda x: self.check_binary_regex(
-                template, activity_map[item_set[0]], activity_map[item_set[1]], x
-            )
-        )
+        variant_frame["activation"] = activation
+        variant_frame["satisfaction"] = satisfaction
         variant_frame["satisfied_when_activated"] = (
             variant_frame["satisfaction"] & variant_frame["activation"]
         )
@@ -274,108 +429,332 @@ class RegexChecker:
             else 0.0
         )
         if support >= min_support:
-            ops = [item_set[0], item_set[1]]
-            atom_str = f"{template}[{item_set[0]}, {item_set[1]}] | | |"
-            new_atom = ProcessAtom(
-                id=str(uuid4()),
-                atom_type=template,
-                atom_str=atom_str,
-                arity=2,
-                level="Activity",
-                cardinality=0,
-                operands=ops,
-                object_type="",
-                signal_query=self.signal_query_builder.get_declare_query(
-                    self.process,
-                    templ_str=template,
-                    arg_1=item_set[0],
-                    arg_2=item_set[1],
-                    count=True,
-                    consider_vacuity=consider_vacuity,
-                ),
-                activation_conditions=[ops[i] for i in activation_based_on[template]],
-                target_conditions=[],
-                support=support,
-                provision_type="LOG_MINED",
-                providers=[self.process],
-                process=self.process,
-                attributes={"confidence": confidence},
+            atoms.append(
+                self._binary_atom(
+                    item_set, template, support, confidence, consider_vacuity
+                )
             )
-            atoms.append(new_atom)
+
+    def _binary_atom(
+        self,
+        item_set: list[str],
+        template: str,
+        support: float,
+        confidence: float,
+        consider_vacuity: bool,
+    ) -> ProcessAtom:
+        ops = [item_set[0], item_set[1]]
+        atom_str = f"{template}[{item_set[0]}, {item_set[1]}] | | |"
+        return ProcessAtom(
+            id=str(uuid4()),
+            atom_type=template,
+            atom_str=atom_str,
+            arity=2,
+            level="Activity",
+            cardinality=0,
+            operands=ops,
+            object_type="",
+            signal_query=self.signal_query_builder.get_declare_query(
+                self.process,
+                templ_str=template,
+                arg_1=item_set[0],
+                arg_2=item_set[1],
+                count=True,
+                consider_vacuity=consider_vacuity,
+            ),
+            activation_conditions=[ops[i] for i in activation_based_on[template]],
+            target_conditions=[],
+            support=support,
+            provision_type="LOG_MINED",
+            providers=[self.process],
+            process=self.process,
+            attributes={"confidence": confidence},
+        )
 
     def discover_unary(
         self,
         variant_frame: DataFrame,
         item_set: list[str],
         template: str,
-        activity_map: dict[str, str],
+        cardinality: int,
+        satisfaction: np.ndarray,
+        activation: np.ndarray,
         consider_vacuity: bool,
         min_support: float,
         atoms: list[ProcessAtom],
     ):
-        for i in [1]:
-            variant_frame["satisfaction"] = variant_frame["enc_variant_string"].apply(
-                lambda x: self.check_unary_regex(
-                    template, activity_map[item_set[0]], i, i, x
-                )
-            )
-            variant_frame["activation"] = variant_frame["enc_variant_string"].apply(
-                lambda x: is_activated(template, activity_map[item_set[0]], None, x)
-            )
-            num_satisfactions = (
-                variant_frame["variant_frequency"]
-                .where(variant_frame["satisfaction"])
-                .sum()
+        variant_frame["satisfaction"] = satisfaction
+        variant_frame["activation"] = activation
+        num_satisfactions = (
+            variant_frame["variant_frequency"]
+            .where(variant_frame["satisfaction"])
+            .sum()
+        )
+        if num_satisfactions == 0:
+            return
+        support = num_satisfactions / len(self.log)
+        num_activations = (
+            variant_frame["variant_frequency"].where(variant_frame["activation"]).sum()
+        )
+        confidence = (
+            variant_frame["variant_frequency"]
+            .where(variant_frame["satisfaction"])
+            .sum()
+            / num_activations
+            if num_activations > 0
+            else 0
+        )
+        if support >= min_support:
+            atoms.append(
+                self._unary_atom(item_set, template, cardinality, support, confidence)
             )
-            if num_satisfactions == 0:
+
+    def _unary_atom(
+        self,
+        item_set: list[str],
+        template: str,
+        cardinality: int,
+        support: float,
+        confidence: float,
+    ) -> ProcessAtom:
+        ops = [item_set[0]]
+        atom_str = f"{template}{cardinality}[{item_set[0]}] | |"
+        return ProcessAtom(
+            id=str(uuid4()),
+            atom_type=template,
+            atom_str=atom_str,
+            arity=1,
+            level="Activity",
+            cardinality=cardinality,
+            operands=ops,
+            object_type="",
+            signal_query=self.signal_query_builder.get_declare_query(
+                self.process,
+                templ_str=template,
+                m=cardinality,
+                n=cardinality,
+                arg_1=item_set[0],
+                count=True,
+            ),
+            activation_conditions=[ops[i] for i in activation_based_on[template]],
+            target_conditions=[],
+            support=support,
+            provision_type="LOG_MINED",
+            providers=[self.process],
+            process=self.process,
+            attributes={"confidence": confidence},
+        )
+
+    def _discover_candidates(
+        self,
+        candidates: list[tuple[str, list[str], int]],
+        variant_frame: DataFrame,
+        activity_map: dict,
+        consider_vacuity: bool,
+        min_support: float,
+        progress: bool = True,
+    ) -> tuple[list[ProcessAtom], int]:
+        """
+        Check the candidates of `run` and return the discovered atoms in the order of
+        `candidates` together with the number of pruned candidates.
+        """
+        atoms = []
+        satisfaction, activation, checked = self._evaluate_with_pruning(
+            candidates, variant_frame, activity_map, consider_vacuity, min_support
+        )
+        for i, (template, ops, cardinality) in enumerate(
+            tqdm(candidates, disable=not progress)
+        ):
+            if not checked[i]:
+                continue
+            if len(ops) == 2:
+                self.discover_binary(
+                    variant_frame,
+                    ops,
+                    template,
+                    satisfaction[:, i],
+                    activation[:, i],
+                    consider_vacuity,
+                    min_support,
+                    atoms,
+                )
+            else:
+                self.discover_unary(
+                    variant_frame,
+                    ops,
+                    template,
+                    cardinality,
+                    satisfaction[:, i],
+                    activation[:, i],
+                    consider_vacuity,
+                    min_support,
+                    atoms,
+                )
+        return atoms, len(candidates) - int(checked.sum())
+
+    def _evaluate_with_pruning(
+        self,
+        candidates: list[tuple[str, list[str], int]],
+        variant_frame: DataFrame,
+        activity_map: dict,
+        consider_vacuity: bool,
+        min_support: float,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Evaluate the candidates of `run`, skipping binary candidates that cannot be
+        discovered:
+
+        * candidates that are never activated or whose support is bounded below
+          `min_support` by their number of activations and, for the templates in
+          `co_occurrence_templates`, by the co-occurrences of their operands
+        * candidates whose weaker template (see `weaker_templates`) is not discovered
+          for the same operands
+
+        The candidates are therefore evaluated from the weakest to the strongest
+        template of each family.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: The satisfaction and activation
+            matrices of `_evaluate_atoms` and a boolean array that marks the candidates
+            that were checked. The columns of the unchecked candidates are all False.
+        """
+        num_cases = len(self.log)
+        frequencies = variant_frame["variant_frequency"].to_numpy()
+        satisfaction = np.zeros((len(frequencies), len(candidates)), dtype=bool)
+        activation = np.zeros((len(frequencies), len(candidates)), dtype=bool)
+        checked = np.ones(len(candidates), dtype=bool)
+
+        columns = {}
+        depths = np.zeros(len(candidates), dtype=int)
+        for i, (template, ops, _) in enumerate(candidates):
+            columns[(template, tuple(ops))] = i
+            if len(ops) != 2:
                 continue
-            support = num_satisfactions / len(self.log)
-            num_activations = (
-                variant_frame["variant_frequency"]
-                .where(variant_frame["activation"])
-                .sum()
+            weaker = template
+            while weaker in weaker_templates:
+                weaker = weaker_templates[weaker]
+                depths[i] += 1
+
+            a_ids, b_ids = self._operand_ids(ops, activity_map)
+            occurs_a = self.occurrence_index.occurs(a_ids)
+            occurs_b = self.occurrence_index.occurs(b_ids)
+            num_activations = frequencies @ is_activated(
+                template, self.occurrence_index, a_ids, b_ids
             )
-            confidence = (
-                variant_frame["variant_frequency"]
-                .where(variant_frame["satisfaction"])
-                .sum()
-                / num_activations
-                if num_activations > 0
-                else 0
+            max_satisfactions = num_activations
+            if template in co_occurrence_templates:
+                max_satisfactions = min(
+                    num_activations, frequencies @ (occurs_a & occurs_b)
+                )
+            if consider_vacuity:
+                max_satisfactions += num_cases - num_activations
+            if num_activations == 0 or max_satisfactions / num_cases < min_support:
+                checked[i] = False
+
+        for depth in range(depths.max(initial=0) + 1):
+            phase = []
+            for i in np.flatnonzero((depths == depth) & checked):
+                template, ops, _ = candidates[i]
+                weaker = columns.get((weaker_templates.get(template), tuple(ops)))
+                if weaker is not None and not self._is_discovered(
+                    satisfaction[:, weaker],
+                    activation[:, weaker],
+                    frequencies,
+                    consider_vacuity,
+                    min_support,
+                ):
+                    checked[i] = False
+                else:
+                    phase.append(i)
+            satisfaction[:, phase], activation[:, phase] = self._evaluate_atoms(
+                [candidates[i] for i in phase], activity_map
             )
-            if support >= min_support:
-                ops = [item_set[0]]
-                atom_str = f"{template}{i}[{item_set[0]}] | |"
-                new_atom = ProcessAtom(
-                    id=str(uuid4()),
-                    atom_type=template,
-                    atom_str=atom_str,
-                    arity=1,
-                    level="Activity",
-                    cardinality=i,
-                    operands=ops,
-                    object_type="",
-                    signal_query=self.signal_query_builder.get_declare_query(
-                        self.process,
-                        templ_str=template,
-                        m=i,
-                        n=i,
-                        arg_1=item_set[0],
-                        count=True,
-                    ),
-                    activation_conditions=[
-                        ops[i] for i in activation_based_on[template]
-                    ],
-                    target_conditions=[],
-                    support=support,
-                    provision_type="LOG_MINED",
-                    providers=[self.process],
-                    process=self.process,
-                    attributes={"confidence": confidence},
+        return satisfaction, activation, checked
+
+    def _is_discovered(
+        self,
+        satisfaction: np.ndarray,
+        activation: np.ndarray,
+        frequencies: np.ndarray,
+        consider_vacuity: bool,
+        min_support: float,
+    ) -> bool:
+        """
+        Whether `discover_binary` discovers an atom with the given satisfaction and
+        activation of the variants. False for a candidate that was not checked.
+        """
+        if not consider_vacuity:
+            satisfaction = satisfaction & activation
+        num_satisfactions = frequencies @ satisfaction
+        if (
+            consider_vacuity and frequencies @ activation == 0
+        ) or num_satisfactions == 0:
+            return False
+        return num_satisfactions / len(self.log) >= min_support
+
+    def _discover_in_parallel(
+        self,
+        candidates: list[tuple[str, list[str], int]],
+        shard_bounds: list[int],
+        variant_frame: DataFrame,
+        activity_map: dict,
+        n_jobs: int,
+        **kwargs,
+    ) -> tuple[list[ProcessAtom], int]:
+        """
+        Discover the atoms among `candidates` in `n_jobs` worker processes.
+
+        `shard_bounds` holds the offsets in `candidates` at which a new item set starts.
+        The item sets are split into contiguous shards and the atoms are concatenated in
+        shard order, so they are returned in the same order as by a single process.
+        """
+        global _shared_state
+        splits = np.array_split(np.asarray(shard_bounds), n_jobs)
+        splits = [split for split in splits if len(split) > 0]
+        ends = [split[0] for split in splits[1:]] + [len(candidates)]
+        shards = [(split[0], end) for split, end in zip(splits, ends)]
+        _shared_state = (self, candidates, variant_frame, activity_map, kwargs)
+        try:
+            with ProcessPoolExecutor(
+                max_workers=len(shards),
+                mp_context=multiprocessing.get_context("fork"),
+            ) as executor:
+                results = list(
+                    tqdm(executor.map(_discover_shard, shards), total=len(shards))
                 )
-                atoms.append(new_atom)
-            if template not in supports_cardinality:
-                break
+        finally:
+            _shared_state = None
+        atoms = [atom for shard_atoms, _ in results for atom in shard_atoms]
+        return atoms, sum(num_pruned for _, num_pruned in results)
+
+    @staticmethod
+    def _candidates(
+        item_sets, considered_templates: list[str]
+    ) -> tuple[list[tuple[str, list[str], int]], list[int]]:
+        """
+        Return the candidates (template, operands, cardinality) for the given item sets
+        and the offsets in the candidates at which a new item set starts.
+        """
+        candidates = []
+        shard_bounds = []
+        for item_set in item_sets:
+            item_set = list(item_set)
+            shard_bounds.append(len(candidates))
+            for template in considered_templates:
+                if (
+                    len(item_set) == 2
+                    and template in binary_strings
+                    and item_set[0] != item_set[1]
+                ):
+                    for ops in [item_set, item_set[::-1]]:
+                        candidates.append((template, ops, 0))
+
+                if len(item_set) == 1 and template in unary_strings:
+                    for i in [1]:
+                        candidates.append((template, item_set, i))
+                        if template not in supports_cardinality:
+                            break
+        return candidates, shard_bounds
 
     def run(
         self,
@@ -383,7 +762,27 @@ class RegexChecker:
         min_support=0.0,
         consider_vacuity=True,
         get_result=False,
+        n_jobs: int = None,
     ) -> list[ProcessAtom]:
+        """
+        Mine the atoms of `considered_templates` from the log.
+
+        Args:
+            considered_templates (list[str]): The templates to mine.
+            min_support (float): The minimum support of the mined atoms.
+            consider_vacuity (bool): Whether vacuously satisfied cases count as
+                satisfactions.
+            n_jobs (int): Number of worker processes among which the item sets are
+                sharded. By default, all candidates are checked in the calling process;
+                -1 uses all CPUs. The atoms are returned in the same order for any
+                number of workers.
+
+        Candidates that cannot reach `min_support` are pruned before they are checked;
+        their number is kept in `num_pruned_candidates`.
+
+        Returns:
+            list[ProcessAtom]: The mined atoms.
+        """
         atoms = []
         if considered_templates is None:
             return atoms
@@ -391,73 +790,185 @@ class RegexChecker:
             min_support=min_support, len_itemset=2, algorithm="apriori"
         )
         activities = self.log.unique_activities()
-        activity_map = self._map_activities_to_letters(activities)
+        activity_map = self._map_activities_to_ids(activities)
         variant_frame = self.create_variant_frame_from_log(activity_map)
         item_sets = self.d4py.frequent_item_sets["itemsets"]
-        for item_set in tqdm(item_sets):
-            item_set = list(item_set)
-            atoms_per_item_set = []
-            for template in considered_templates:
-                if (
-                    len(item_set) == 2
-                    and template in binary_strings
-                    and item_set[0] != item_set[1]
-                ):
-                    self.discover_binary(
-                        variant_frame,
-                        item_set,
-                        template,
-                        activity_map,
-                        consider_vacuity,
-                        min_support,
-                        atoms_per_item_set,
-                    )
-                    self.discover_binary(
-                        variant_frame,
-                        item_set[::-1],
-                        template,
-                        activity_map,
-                        consider_vacuity,
-                        min_support,
-                        atoms_per_item_set,
+
+        # Collect all candidates first so that they are checked in a single sweep over
+        # the variants
+        candidates, shard_bounds = self._candidates(item_sets, considered_templates)
+        if n_jobs is not None and n_jobs < 0:
+            n_jobs = os.cpu_count()
+        # the workers inherit the variant frame and the encoding when they are forked
+        if (
+            n_jobs is not None
+            and n_jobs > 1
+            and len(shard_bounds) > 1
+            and "fork" in multiprocessing.get_all_start_methods()
+        ):
+            atoms, self.num_pruned_candidates = self._discover_in_parallel(
+                candidates,
+                shard_bounds,
+                variant_frame,
+                activity_map,
+                n_jobs,
+                consider_vacuity=consider_vacuity,
+                min_support=min_support,
+            )
+        else:
+            atoms, self.num_pruned_candidates = self._discover_candidates(
+                candidates, variant_frame, activity_map, consider_vacuity, min_support
+            )
+        return atoms
+
+    def _context_weights(self, contexts: list[EventLog]) -> np.ndarray:
+        """
+        Return the number of cases of each context (rows) in each variant of the log
+        (columns). The cases of the contexts have to be cases of the log.
+        """
+        index = self.log.variant_index
+        case_ids = Index(index.case_ids)
+        weights = np.zeros((len(contexts), len(index)), dtype=np.int64)
+        for row, context in enumerate(contexts):
+            cases = case_ids.get_indexer(context.variant_index.case_ids)
+            if (cases < 0).any():
+                raise ValueError("The cases of a context have to be cases of the log")
+            weights[row] = np.bincount(index.case_variants[cases], minlength=len(index))
+        return weights
+
+    def _context_item_sets(
+        self,
+        contexts: list[EventLog],
+        weights: np.ndarray,
+        activities: list[str],
+        min_support: float,
+    ) -> list[list[frozenset]]:
+        """
+        Return the item sets of at most two activities that
+        `Declare.compute_frequent_itemsets` finds in each context, in the same order,
+        given the number of cases of each context in each variant (see
+        `_context_weights`).
+        """
+        occurs = (self.occurrence_index.counts > 0).astype(np.int64)
+        activity_ids = {activity: a for a, activity in enumerate(activities)}
+        # the activities in the order of their labels, like the one-hot encoding
+        order = np.argsort(np.asarray(activities, dtype=object), kind="stable")
+        context_item_sets = []
+        for context, context_weights in zip(contexts, weights):
+            if min_support == 0:
+                # without a support threshold, the item sets are the combinations of
+                # the activities of the context in the order of their first occurrence
+                order = [activity_ids[a] for a in context.unique_activities()]
+            num_traces = context_weights.sum()
+            counts = context_weights @ occurs
+            frequent = [
+                a
+                for a in order
+                if counts[a] > 0 and counts[a] / num_traces >= min_support
+            ]
+            item_sets = [frozenset([activities[a]]) for a in frequent]
+            if min_support > 0:
+                frequent_occurs = occurs[:, frequent]
+                pair_counts = (frequent_occurs.T * context_weights) @ frequent_occurs
+            for i, j in zip(*np.triu_indices(len(frequent), k=1)):
+                if min_support == 0 or pair_counts[i, j] / num_traces >= min_support:
+                    item_sets.append(
+                        frozenset([activities[frequent[i]], activities[frequent[j]]])
                     )
+            context_item_sets.append(item_sets)
+        return context_item_sets
 
-                if len(item_set) == 1 and template in unary_strings:
-                    self.discover_unary(
-                        variant_frame,
-                        item_set,
-                        template,
-                        activity_map,
-                        consider_vacuity,
-                        min_support,
-                        atoms_per_item_set,
+    def run_per_context(
+        self,
+        contexts: dict[Any, EventLog],
+        considered_templates: list[str],
+        min_support=0.0,
+        consider_vacuity=True,
+    ) -> dict[Any, list[ProcessAtom]]:
+        """
+        Mine the atoms of `considered_templates` from each of several sub-logs of the
+        log, e.g. the ones of `split_on_case_attribute`.
+
+        The candidates of all contexts are evaluated once on the variants of the log and
+        the support and confidence of each context are aggregated from the number of
+        its cases in each variant. Each context gets the same atoms in the same order as
+        with `RegexChecker(process, context).run(...)`, so that aggregating them keeps
+        the same orientation of symmetric atoms such as `Co-Existence`.
+
+        Returns:
+            dict[Any, list[ProcessAtom]]: The mined atoms of each context.
+        """
+        if considered_templates is None:
+            return {context: [] for context in contexts}
+        activities = self.log.unique_activities()
+        activity_map = self._map_activities_to_ids(activities)
+        self.create_variant_frame_from_log(activity_map)
+        weights = self._context_weights(list(contexts.values()))
+        context_item_sets = self._context_item_sets(
+            list(contexts.values()), weights, activities, min_support
+        )
+
+        # the candidates of all contexts, each evaluated once
+        columns = {}
+        context_candidates = []
+        for item_sets in context_item_sets:
+            candidates, _ = self._candidates(item_sets, considered_templates)
+            context_candidates.append(candidates)
+            for template, ops, cardinality in candidates:
+                columns.setdefault((template, tuple(ops), cardinality), len(columns))
+        satisfaction, activation = self._evaluate_atoms(
+            [(template, list(ops), card) for template, ops, card in columns],
+            activity_map,
+        )
+        satisfied_when_activated = satisfaction & activation
+        binary = np.array([len(ops) == 2 for _, ops, _ in columns], dtype=bool)
+        if not consider_vacuity:
+            satisfaction[:, binary] = satisfied_when_activated[:, binary]
+        num_satisfactions = weights @ satisfaction
+        num_satisfactions_when_activated = weights @ satisfied_when_activated
+        num_activations = weights @ activation
+
+        context_atoms = {}
+        for row, (context, log) in enumerate(contexts.items()):
+            atoms = []
+            for template, ops, cardinality in context_candidates[row]:
+                i = columns[(template, tuple(ops), cardinality)]
+                satisfactions = num_satisfactions[row, i]
+                activations = num_activations[row, i]
+                support = satisfactions / len(log)
+                if satisfactions == 0 or support < min_support:
+                    continue
+                if binary[i]:
+                    if consider_vacuity and activations == 0:
+                        continue
+                    confidence = (
+                        num_satisfactions_when_activated[row, i] / activations
+                        if activations > 0
+                        else 0.0
                     )
-            # TODO apply the pruning strategy based on
-            # * number of activations
-            # * hierarchy of the templates
-            atoms.extend(atoms_per_item_set)
-        return atoms
+                    atoms.append(
+                        self._binary_atom(
+                            ops, template, support, confidence, consider_vacuity
+                        )
+                    )
+                else:
+                    confidence = satisfactions / activations if activations > 0 else 0
+                    atoms.append(
+                        self._unary_atom(
+                            ops, template, cardinality, support, confidence
+                        )
+                    )
+            context_atoms[context] = atoms
+        return context_atoms
 
     @staticmethod
     def check_unary_regex(templ_str, a, m, n, string) -> bool:
         # unary constraints are always activated -> there is no need to check for activation here
-        regx = instantiate_unary_regex(templ_str, a, m, n)
-        match = re.search(regx, string) is not None
-        if match:
-            if match is True:
-                return True
-            return match.span() == (0, len(string))
-        return False
+        return regex_cache.get(templ_str, a, m=m, n=n).search(string) is not None
 
     @staticmethod
     def check_binary_regex(templ_str, a, b, string) -> bool:
-        regx = instantiate_binary_regex(templ_str, a, b)
-        # print(regx, string)
-        match = re.search(regx, string)
-        if match:
-            holds = match.span() == (0, len(string))
-            return holds
-        return False
+        return full_match(regex_cache.get(templ_str, a, b), string)
 
     # TODO this is just temporay and should be natively intergrated in the atom itself
     def check_time_constraint_violation(
@@ -506,26 +1017,36 @@ class RegexChecker:
             operand for atom in process_atoms for operand in atom.operands
         }
         activities = list(set(self.log.unique_activities() + list(atom_activities)))
-        activity_map = self._map_activities_to_letters(activities)
+        activity_map = self._map_activities_to_ids(activities)
         variant_frame = self.create_variant_frame_from_log(activity_map)
+
+        # Check all atoms together in a single sweep over the variants
+        columns = {}
+        specs = []
+        for atom in process_atoms:
+            if atom.arity in (1, 2):
+                columns[atom.id] = len(specs)
+                specs.append((atom.atom_type, atom.operands, atom.cardinality))
+        satisfaction, activation = self._evaluate_atoms(specs, activity_map)
+        if not consider_vacuity:
+            # unary atoms are always activated
+            satisfaction &= activation
+
         violations = []
         for atom in process_atoms:
-            satisfaction = self.compute_satisfaction(
-                atom, variant_frame, activity_map, consider_vacuity
-            )
-            if satisfaction is not None:
-                atom_violations = variant_frame[~satisfaction]
-                cases = []
-                for _, row in atom_violations.iterrows():
-                    cases.extend(row["case_ids"])
-                # if len(cases) > 0:
+            if atom.id in columns:
+                case_indices = self.variant_cases.gather(
+                    ~satisfaction[:, columns[atom.id]]
+                )
+                # if len(case_indices) > 0:
                 violations.append(
                     Violation(
                         id=str(uuid4()),
                         log=self.process,
                         atom=atom,
-                        cases=cases,
-                        frequency=len(cases),
+                        case_indices=case_indices,
+                        case_ids=self.variant_cases.case_ids,
+                        frequency=len(case_indices),
                         attributes={},
                     )
                 )
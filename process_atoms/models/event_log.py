@@ -1,4 +1,9 @@
+import json
+import logging
+import os
+import sys
 from dataclasses import dataclass
+from pathlib import Path
 from typing import Any, Iterable, Iterator, Mapping, Union, overload
 
 import numpy as np
@@ -14,27 +19,36 @@ from process_atoms.models.column_types import (
     _ColumnType,
 )
 
+_logger = logging.getLogger(__name__)
+
 
 class EventLogSchemaTypes(BaseModel):
     cases: dict[str, type[_ColumnType]]
     events: dict[str, type[_ColumnType]]
 
-    """
-    TODO: add validator that parses types from string to type using  `COLUMN_TYPES`
-    @model_validator(mode='before')
+    @model_validator(mode="before")
     @classmethod
-    def check_card_number_omitted(cls, data: Any) -> Any:
+    def parse_type_names(cls, data: Any) -> Any:
+        """
+        Turn the names from `ColumnTypeName` that `ser_model` produces back into the
+        subtypes of `ColumnType`, so that serialized schemas can be loaded.
+        """
         if isinstance(data, dict):
-            assert (
-                'card_number' not in data
-            ), 'card_number should not be included'
+            data = {
+                table: (
+                    {
+                        col: COLUMN_TYPES[C] if isinstance(C, str) else C
+                        for (col, C) in coltypes.items()
+                    }
+                    if table in ("cases", "events") and isinstance(coltypes, dict)
+                    else coltypes
+                )
+                for (table, coltypes) in data.items()
+            }
         return data
-    """
 
     @model_validator(mode="after")
     def check_special_columns_exist(self) -> "EventLogSchemaTypes":
-        # TODO: set values from string to type where necessary so that this model
-        # can be deserialized. (Currently only serialization works).
         self.get_case_column(CaseID)
         self.get_event_column(CaseID)
         self.get_event_column(EventType)
@@ -176,6 +190,57 @@ class Case:
         return self.events[self.schema.get_event_column(EventType)].tolist()
 
 
+class _CaseAttributes(Mapping):
+    """The attributes of a case, read from the shared columns of the case frame."""
+
+    def __init__(self, columns: dict[str, np.ndarray], row: int):
+        self._columns = columns
+        self._row = row
+
+    def __getitem__(self, key: str) -> Any:
+        return self._columns[key][self._row]
+
+    def __iter__(self):
+        return iter(self._columns)
+
+    def __len__(self):
+        return len(self._columns)
+
+
+@dataclass
+class CaseView:
+    """
+    A lightweight case as yielded by `EventLog.iter_cases`. The arrays are slices of
+    arrays shared by all cases of the log, so no data frame is built per case.
+    """
+
+    # Log that holds the data of the case and the row of the case in its `cases`
+    log: "EventLog"
+    row: int
+    # Case-level attributes
+    attributes: Mapping[str, Any]
+    # Rows of the events of the case in `log.events`
+    start: int
+    end: int
+    # Activity codes of the events, referring to `labels`
+    activity_codes: np.ndarray
+    # Times of the events as datetime64[ns] values (in UTC for time zone aware logs)
+    timestamps: np.ndarray
+    labels: np.ndarray
+
+    def __len__(self):
+        return self.end - self.start
+
+    def get_activity_sequence(self) -> list[str]:
+        return self.labels[self.activity_codes].tolist()
+
+
+def _concatenate_ranges(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Return the positions `starts[i]` to `starts[i] + lengths[i]` for all `i`."""
+    block_starts = np.cumsum(lengths) - lengths
+    return np.repeat(starts - block_starts, lengths) + np.arange(lengths.sum())
+
+
 def _get_first_column_of_type(
     coltypes: dict[str, type[ColumnType]], C: type[ColumnType], error=False
 ) -> str:
@@ -190,6 +255,73 @@ def _get_first_column_of_type(
             return None
 
 
+# Attributes of `EventLog` that hold data derived from the cases and events
+_CACHED_ATTRIBUTES = (
+    "_unique_activities",
+    "_activity_counts",
+    "_trace_variant_durations",
+    "_trace_variants",
+    "_variant_index",
+    "_variant_labels_",
+    "_case_offsets",
+    "_case_positions",
+    "_event_times_ns",
+    "_first_occurrences",
+    "_avg_duration",
+)
+
+
+def _nbytes(value: Any) -> int:
+    """Approximate the memory used by a cached value in bytes."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (pd.Index, pd.Series)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, VariantIndex):
+        return sum(_nbytes(array) for array in vars(value).values())
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            _nbytes(key) + _nbytes(item) for key, item in value.items()
+        )
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(map(_nbytes, value))
+    return sys.getsizeof(value)
+
+
+# Multiplier of the polynomial hash of activity sequences in `_index_variants`
+_SEQUENCE_HASH_BASE = np.uint64(0x9E3779B97F4A7C15)
+
+
+@dataclass
+class VariantIndex:
+    """
+    The trace variants of an event log.
+
+    Cases are numbered in the order of their case IDs and variants in the order in
+    which they first appear in that case order.
+    """
+
+    # Variant of each case
+    case_variants: np.ndarray
+    # IDs of the cases
+    case_ids: np.ndarray
+    # Duration of each case in nanoseconds, from its first to its last event
+    case_durations: np.ndarray
+    # Activity codes of variant `i` are `codes[offsets[i]:offsets[i + 1]]`
+    codes: np.ndarray
+    offsets: np.ndarray
+    # Number of cases of each variant
+    counts: np.ndarray
+
+    def __len__(self):
+        return len(self.counts)
+
+    def variant_cases(self) -> list[np.ndarray]:
+        """Return the positions of the cases of each variant, in case order."""
+        order = np.argsort(self.case_variants, kind="stable")
+        return np.split(order, np.cumsum(self.counts)[:-1])
+
+
 @dataclass
 class EventLog:
     """
@@ -209,10 +341,7 @@ class EventLog:
     ):
         self.cases = cases
         self.events = events
-        self._unique_activities = None
-        self._activity_counts = None
-        self._trace_variant_durations = None
-        self._trace_variants = None
+        self._clear_caches()
 
         # Use the data to instantiate the `ColumnType`s
         if isinstance(schema, EventLogSchemaTypes):
@@ -223,28 +352,21 @@ class EventLog:
             self.schema = schema
 
         # For performance reasons and so that code working with `EventLog` can make some
-        # assumptions, we create a multi-level index on the events and also sort them by
-        # time.
+        # assumptions, we create a multi-level index on the events and sort them by case
+        # and time.
         # If an index with the correct name is already there, we assume we don't need to
         # reindex the event log
-        if not self.events.index.names == ["case_id", "event_id"]:
-            # Sort events by time before creating an index
-            self.events = self.events.sort_values(
-                self.schema.get_event_column(EventTime)
-            )
-
+        reindex = not self.events.index.names == ["case_id", "event_id"]
+        case_codes, case_labels = self._sort_events()
+        if reindex:
             # Create integer IDs for cases and events. Using the (string) case and event IDs
             # is not performant, as building the index requires sorting values.
             case_id_col: str = self.schema.get_case_column(CaseID)
-            case_ids_orig = self.cases[case_id_col]
             case_ids = np.arange(len(self.cases))
             event_ids = np.arange(len(self.events))
-            id_to_i = {
-                case_id: i for (case_id, i) in zip(case_ids_orig, range(1000000000))
-            }
-            case_ids_events = self.events[self.schema.get_event_column(CaseID)].map(
-                id_to_i
-            )
+            # Only the distinct case IDs of the events are looked up
+            case_positions = pd.Index(self.cases[case_id_col]).get_indexer(case_labels)
+            case_ids_events = np.where(case_codes >= 0, case_positions[case_codes], -1)
 
             # Set index for cases
             self.cases = self.cases.set_index(case_ids)
@@ -268,20 +390,162 @@ class EventLog:
             self.events.rename(columns={"event_id": "_event_id"}, inplace=True)
             self.schema.events["_event_id"] = self.schema.events["event_id"]
             del self.schema.events["event_id"]
-        # sanitize labels for Event Type
-        self.events[self.schema.get_event_column(EventType)] = (
-            self.events[self.schema.get_event_column(EventType)]
+
+        self._encode_columns(case_codes, case_labels)
+
+    def _encode_columns(self, case_codes: np.ndarray, case_labels: pd.Index):
+        """
+        Store the case IDs and event types of the sorted events as categoricals, given
+        the codes and labels of the case IDs returned by `_sort_events`.
+        """
+        # The case IDs are categorized in sorted order, so their codes are ordered like
+        # the IDs.
+        self.events[self.schema.get_event_column(CaseID)] = pd.Categorical.from_codes(
+            case_codes, case_labels
+        )
+        # sanitize labels for Event Type. Only the categories are rewritten.
+        event_type_col = self.schema.get_event_column(EventType)
+        codes, labels = pd.factorize(self.events[event_type_col])
+        labels = (
+            pd.Series(labels, dtype=object)
             .str.replace("[", "(")
             .str.replace("]", ")")
             .str.replace("|", " ")
         )
-        # sort events by case id and event time
-        self.events = self.events.sort_values(
-            [
-                self.schema.get_event_column(CaseID),
-                self.schema.get_event_column(EventTime),
-            ]
+        # distinct labels can become equal when they are sanitized
+        label_codes, labels = pd.factorize(labels)
+        codes = np.where(codes >= 0, label_codes[codes], -1)
+        self.events[event_type_col] = pd.Categorical.from_codes(codes, labels)
+
+    def _clear_caches(self):
+        self._columns: dict[tuple[str, type[ColumnType]], str] = {}
+        for name in _CACHED_ATTRIBUTES:
+            setattr(self, name, None)
+
+    def invalidate_caches(self):
+        """
+        Drop all data derived from the cases and events, such as the variants, the
+        activity counts and the resolved column names, and restore the invariants of
+        the constructor: the events are sorted by case and time again, the case level
+        of their index refers to the rows of `cases` again, and the case IDs and event
+        types are categorized again. Call this after modifying `cases`, `events` or
+        `schema` in place, e.g. after changing the type of a column or appending or
+        reordering events.
+
+        Views of the log (see `EventLogView`) are not notified. Call their
+        `invalidate_caches` after this one.
+        """
+        self._clear_caches()
+        case_codes, case_labels = self._sort_events()
+        if self.events.index.names == ["case_id", "event_id"]:
+            case_positions = self.case_positions.get_indexer(case_labels)
+            self.events.index = pd.MultiIndex.from_arrays(
+                [
+                    np.where(case_codes >= 0, case_positions[case_codes], -1),
+                    self.events.index.get_level_values("event_id"),
+                ],
+                names=["case_id", "event_id"],
+            )
+        self._encode_columns(case_codes, case_labels)
+
+    def cache_info(self) -> dict[str, int]:
+        """
+        Return the approximate memory used by each cached value in bytes, by the name
+        of the value. Values that have not been computed yet are left out.
+        """
+        return {
+            name.strip("_"): _nbytes(getattr(self, name))
+            for name in _CACHED_ATTRIBUTES
+            if getattr(self, name) is not None
+        }
+
+    def _case_column(self, C: type[ColumnType]) -> str:
+        """Return the name of the first case column of type `C`, see `schema`."""
+        column = self._columns.get(("cases", C))
+        if column is None:
+            column = self._columns[("cases", C)] = self.schema.get_case_column(C)
+        return column
+
+    def _event_column(self, C: type[ColumnType]) -> str:
+        """Return the name of the first event column of type `C`, see `schema`."""
+        column = self._columns.get(("events", C))
+        if column is None:
+            column = self._columns[("events", C)] = self.schema.get_event_column(C)
+        return column
+
+    def _sort_events(self) -> tuple[np.ndarray, pd.Index]:
+        """
+        Sort the events by case ID and event time in a single stable sort, so events
+        with the same case and time keep their order.
+
+        Returns:
+            tuple[np.ndarray, pd.Index]: The codes of the case IDs of the sorted events
+            and the sorted case IDs they refer to.
+        """
+        case_codes, case_labels = pd.factorize(
+            self.events[self.schema.get_event_column(CaseID)], sort=True
         )
+        # `values` gives plain datetime64 values for time zone aware columns as well
+        times = self.events[self.schema.get_event_column(EventTime)].values
+        order = np.lexsort((times, case_codes))
+        self.events = self.events.iloc[order]
+        # the IDs of an already categorical column are returned as a categorical index
+        return case_codes[order], pd.Index(np.asarray(case_labels))
+
+    def _codes(self, C: type[ColumnType]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Return the categorical codes of the event column of type `C` and the labels
+        that they refer to.
+        """
+        column = self.events[self._event_column(C)]
+        # `cat.codes` would copy the codes
+        return (
+            column.array.codes,
+            column.cat.categories.to_numpy(dtype=object),
+        )
+
+    def _event_times(self) -> np.ndarray:
+        """Return the event times in nanoseconds, in the order of the events."""
+        if self._event_times_ns is None:
+            # `values` gives plain datetime64 values for time zone aware columns as well
+            self._event_times_ns = (
+                self.events[self._event_column(EventTime)]
+                .values.astype("datetime64[ns]")
+                .view(np.int64)
+            )
+        return self._event_times_ns
+
+    @property
+    def case_offsets(self) -> np.ndarray:
+        """
+        Offsets of the events of each case in `events`. The events of the case whose
+        case ID has code `i` (see `_codes(CaseID)`) are the rows from `case_offsets[i]`
+        to `case_offsets[i + 1]`.
+        """
+        if self._case_offsets is None:
+            cases, case_labels = self._codes(CaseID)
+            self._case_offsets = np.searchsorted(
+                cases, np.arange(len(case_labels) + 1), side="left"
+            )
+        return self._case_offsets
+
+    @property
+    def case_positions(self) -> pd.Index:
+        """The case IDs of the rows of `cases`, to look up the row of a case ID."""
+        if self._case_positions is None:
+            self._case_positions = pd.Index(self.cases[self._case_column(CaseID)])
+        return self._case_positions
+
+    def _case_codes(self, case_ids) -> np.ndarray:
+        """Return the codes of the given case IDs, or -1 for unknown case IDs."""
+        column = self.events[self._event_column(CaseID)]
+        return column.cat.categories.get_indexer(np.asarray(case_ids, dtype=object))
+
+    def _case(self, position: int) -> Case:
+        attributes = self.cases.iloc[position]
+        code = self._case_codes([attributes[self._case_column(CaseID)]])[0]
+        start, end = (0, 0) if code < 0 else self.case_offsets[code : code + 2]
+        return Case(attributes, self.events.iloc[start:end].droplevel(0), self.schema)
 
     @overload
     def __getitem__(self, i: Union[int, str]) -> Case:
@@ -297,50 +561,21 @@ class EventLog:
         self, i: Union[int, str, slice, np.ndarray, pd.Index, pd.Series]
     ) -> Union["EventLog", Case]:
         if isinstance(i, int):
-            return Case(
-                self.cases.iloc[i], self.events.loc[self.cases.index[i]], self.schema
-            )
+            return self._case(i)
         elif isinstance(i, str):
-            return Case(self.cases.loc[i], self.events.loc[i], self.schema)
+            return self._case(self.case_positions.get_loc(i))
         elif isinstance(i, slice):
-            index = self.cases.index[i]
-            return EventLog(
-                self.cases.loc[index],
-                self.events.loc[index, :],
-                self.schema,
-            )
-        elif isinstance(i, pd.Index):
-            return EventLog(
-                self.cases.loc[i],
-                self.events.loc[i, :],
-                self.schema,
-            )
-        elif isinstance(i, pd.Series) and i.dtype == np.dtype("bool"):
-            assert (
-                len(i) == len(self.cases)
-            ), "To index with boolean mask, it must have the same length as the case data frame!"
-            index = self.cases.index[i]
-            return EventLog(
-                self.cases.loc[index],
-                self.events.loc[index, :],
-                self.schema,
-            )
+            return EventLogView(self, np.arange(len(self.cases))[i])
         elif isinstance(i, pd.Index):
-            return EventLog(
-                self.cases.loc[i],
-                self.events.loc[i, :],
-                self.schema,
-            )
+            rows = self.cases.index.get_indexer(i)
+            if (rows < 0).any():
+                raise KeyError(f"{i[rows < 0].tolist()} not in the case index")
+            return EventLogView(self, rows)
         elif isinstance(i, (pd.Series, np.ndarray)) and i.dtype == np.dtype("bool"):
             assert (
                 len(i) == len(self.cases)
             ), "To index with boolean mask, it must have the same length as the case data frame!"
-            index = self.cases.index[i]
-            return EventLog(
-                self.cases.loc[index],
-                self.events.loc[index, :],
-                self.schema,
-            )
+            return EventLogView(self, np.flatnonzero(np.asarray(i)))
         else:
             raise ValueError(
                 f"Invalid index `{i}` of type `{type(i)}`. `int` and `str` are valid index types."
@@ -352,6 +587,36 @@ class EventLog:
     def __iter__(self):
         return _EventLogIterator(self)
 
+    def _source(self) -> tuple["EventLog", np.ndarray]:
+        """Return the log that holds the data of the cases and their rows in it."""
+        return self, np.arange(len(self.cases))
+
+    def iter_cases(self) -> Iterator[CaseView]:
+        """
+        Iterate over the cases as `CaseView`s, in the order of `cases`. This is much
+        faster than iterating over the log, which builds a `Case` with data frames for
+        every case.
+        """
+        log, rows = self._source()
+        codes = log._case_codes(log.case_positions[rows])
+        # cases without events get empty ranges
+        offsets = np.r_[log.case_offsets, 0]
+        starts, ends = offsets[codes], offsets[np.where(codes >= 0, codes + 1, -1)]
+        activity_codes, labels = log._codes(EventType)
+        times = log._event_times().view("datetime64[ns]")
+        columns = {col: log.cases[col].to_numpy() for col in log.cases.columns}
+        for row, start, end in zip(rows.tolist(), starts.tolist(), ends.tolist()):
+            yield CaseView(
+                log=log,
+                row=row,
+                attributes=_CaseAttributes(columns, row),
+                start=start,
+                end=end,
+                activity_codes=activity_codes[start:end],
+                timestamps=times[start:end],
+                labels=labels,
+            )
+
     def __repr__(self):
         return (
             f"EventLog(\n    cases = (DataFrame with {len(self.cases)} cases)),\n    "
@@ -360,13 +625,27 @@ class EventLog:
         )
 
     @classmethod
-    def from_cases(cls, cases: Iterable[Case]):
+    def from_cases(cls, cases: Iterable[Union[Case, CaseView]]):
         """
-        Construct an `EventLog` from an iterable of `Case`s.
+        Construct an `EventLog` from an iterable of `Case`s or of `CaseView`s.
 
-        Note: this method is inefficient and it should be avoided in favor of operating
-        on complete data frames/event logs.
+        `CaseView`s of the same log are selected from its frames by their rows, which is
+        fast. For `Case`s, this method is inefficient and it should be avoided in favor
+        of operating on complete data frames/event logs.
         """
+        cases = list(cases)
+        if cases and all(
+            isinstance(case, CaseView) and case.log is cases[0].log for case in cases
+        ):
+            log = cases[0].log
+            rows = np.array([case.row for case in cases], dtype=np.int64)
+            starts = np.array([case.start for case in cases], dtype=np.int64)
+            lengths = np.array([len(case) for case in cases], dtype=np.int64)
+            return EventLog(
+                log.cases.iloc[rows],
+                log.events.iloc[_concatenate_ranges(starts, lengths)].droplevel(0),
+                log.schema,
+            )
         case_attributes: list[Case] = []
         events: list[pd.DataFrame] = []
         for case in cases:
@@ -375,164 +654,444 @@ class EventLog:
         schema = case.schema
         return EventLog(pd.DataFrame(case_attributes), pd.concat(events), schema)
 
+    def save(self, path: Union[str, os.PathLike]):
+        """
+        Save the event log to the directory `path`, to be reopened with `open`.
+
+        The codes of the case IDs and event types, the event times, the index of the
+        events and the variant index are saved as NumPy arrays, the case and event type
+        labels and all other attributes as Parquet files and the schema as JSON.
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        case_id_col = self._event_column(CaseID)
+        event_type_col = self._event_column(EventType)
+        event_time_col = self._event_column(EventTime)
+        case_codes, case_labels = self._codes(CaseID)
+        activity_codes, activity_labels = self._codes(EventType)
+        times = self.events[event_time_col]
+        index = self.variant_index
+        arrays = {
+            "case_codes": case_codes,
+            "activity_codes": activity_codes,
+            # `values` gives plain datetime64 values for time zone aware columns as well
+            "times": np.asarray(times.values),
+            "case_offsets": self.case_offsets,
+            "index_case_ids": self.events.index.levels[0].to_numpy(),
+            "index_case_codes": self.events.index.codes[0],
+            "index_event_ids": self.events.index.levels[1].to_numpy(),
+            "index_event_codes": self.events.index.codes[1],
+            "variant_case_variants": index.case_variants,
+            "variant_case_durations": index.case_durations,
+            "variant_codes": index.codes,
+            "variant_offsets": index.offsets,
+            "variant_counts": index.counts,
+        }
+        for name, array in arrays.items():
+            np.save(path / f"{name}.npy", np.asarray(array))
+        pd.DataFrame({"label": case_labels}).to_parquet(path / "case_labels.parquet")
+        pd.DataFrame({"label": activity_labels}).to_parquet(
+            path / "activity_labels.parquet"
+        )
+        self.cases.to_parquet(path / "cases.parquet")
+        other_cols = [
+            col
+            for col in self.events.columns
+            if col not in (case_id_col, event_type_col, event_time_col)
+        ]
+        self.events[other_cols].reset_index(drop=True).to_parquet(
+            path / "events.parquet"
+        )
+        metadata = {
+            "schema": self.schema.model_dump(mode="json"),
+            "event_columns": self.events.columns.tolist(),
+            "time_dtype": str(times.dtype),
+            "label_dtypes": {
+                name: str(self.events[col].cat.categories.dtype)
+                for (name, col) in [
+                    ("case_labels", case_id_col),
+                    ("activity_labels", event_type_col),
+                ]
+            },
+        }
+        (path / "event_log.json").write_text(json.dumps(metadata))
+
+    @classmethod
+    def open(cls, path: Union[str, os.PathLike]) -> "EventLog":
+        """
+        Open an event log that was saved with `save`.
+
+        The arrays are mapped into memory read-only instead of being read, so opening a
+        log is fast and processes that open the same log share its pages. The events are
+        not sorted and indexed again.
+        """
+        path = Path(path)
+        metadata = json.loads((path / "event_log.json").read_text())
+
+        def load(name: str) -> np.ndarray:
+            return np.load(path / f"{name}.npy", mmap_mode="r")
+
+        def labels(name: str) -> pd.Index:
+            return pd.Index(
+                pd.read_parquet(path / f"{name}.parquet")["label"],
+                dtype=metadata["label_dtypes"][name],
+            )
+
+        schema = EventLogSchema.model_validate(metadata["schema"])
+        case_labels = labels("case_labels")
+        times = pd.array(np.asarray(load("times")), copy=False)
+        time_dtype = pd.api.types.pandas_dtype(metadata["time_dtype"])
+        if isinstance(time_dtype, pd.DatetimeTZDtype):
+            times = times.tz_localize("UTC").tz_convert(time_dtype.tz)
+        attributes = pd.read_parquet(path / "events.parquet", memory_map=True)
+        columns = {col: attributes[col].array for col in attributes.columns}
+        columns[schema.get_event_column(CaseID)] = pd.Categorical.from_codes(
+            load("case_codes"), case_labels
+        )
+        columns[schema.get_event_column(EventType)] = pd.Categorical.from_codes(
+            load("activity_codes"), labels("activity_labels")
+        )
+        columns[schema.get_event_column(EventTime)] = times
+        index = pd.MultiIndex(
+            levels=[load("index_case_ids"), load("index_event_ids")],
+            codes=[load("index_case_codes"), load("index_event_codes")],
+            names=["case_id", "event_id"],
+            verify_integrity=False,
+        )
+
+        log = cls.__new__(cls)
+        log.schema = schema
+        log.cases = pd.read_parquet(path / "cases.parquet")
+        log.events = pd.DataFrame(
+            {col: columns[col] for col in metadata["event_columns"]},
+            index=index,
+            copy=False,
+        )
+        log._clear_caches()
+        log._case_offsets = load("case_offsets")
+        log._variant_index = VariantIndex(
+            case_variants=load("variant_case_variants"),
+            case_ids=case_labels.to_numpy(dtype=object),
+            case_durations=load("variant_case_durations"),
+            codes=load("variant_codes"),
+            offsets=load("variant_offsets"),
+            counts=load("variant_counts"),
+        )
+        return log
+
     def unique_activities(self):
         if self._unique_activities is not None:
             return self._unique_activities
-        self._unique_activities = list(
-            self.events[self.schema.get_event_column(EventType)].unique()
-        )
+        codes, labels = self._codes(EventType)
+        self._unique_activities = labels[pd.unique(codes[codes >= 0])].tolist()
         return self._unique_activities
 
     def activity_counts(self) -> dict[str, int]:
         if self._activity_counts is not None:
             return self._activity_counts
+        # `value_counts` of a categorical also counts unused categories
         self._activity_counts = (
-            self.events[self.schema.get_event_column(EventType)]
-            .value_counts()
-            .to_dict()
-        )
-        return (
-            self.events[self.schema.get_event_column(EventType)]
+            self.events[self._event_column(EventType)]
             .value_counts()
+            .loc[lambda counts: counts > 0]
             .to_dict()
         )
+        return self._activity_counts
 
     def activity_sequences(self):
-        cases = self.events[self.schema.get_event_column(CaseID)].to_numpy()
-        activities = self.events[self.schema.get_event_column(EventType)].to_numpy()
-        _, c_ind, c_counts = np.unique(cases, return_index=True, return_counts=True)
-        activity_sequences = []
-        for i in range(len(c_ind)):
-            si = c_ind[i]
-            ei = si + c_counts[i]
-            acts = tuple(activities[si:ei])
-            activity_sequences.append(acts)
-        return activity_sequences
+        variants = self._variant_labels()
+        return [variants[variant] for variant in self.variant_index.case_variants]
+
+    @property
+    def variant_index(self) -> VariantIndex:
+        if self._variant_index is None:
+            self._variant_index = self._index_variants()
+        return self._variant_index
+
+    def _index_variants(self) -> VariantIndex:
+        """
+        Group the cases into variants in one vectorized pass over the sorted events.
+
+        Each case's sequence of activity codes is hashed with a polynomial hash that is
+        computed with a segment reduction. Cases with the same hash are then compared
+        event by event with the first case of their group. If a hash collision is
+        found, the variants are grouped by the exact byte sequences instead.
+        """
+        cases, case_labels = self._codes(CaseID)
+        activities, _ = self._codes(EventType)
+        activities = activities.astype(np.int64)
+        timestamps = self._event_times()
+
+        starts = np.flatnonzero(np.r_[True, cases[1:] != cases[:-1]])[: len(cases)]
+        ends = np.r_[starts[1:], len(cases)]
+        lengths = ends - starts
+        positions = np.arange(len(cases)) - np.repeat(starts, lengths)
+
+        # powers of the base for every position; the products wrap around
+        powers = np.full(lengths.max(initial=0), _SEQUENCE_HASH_BASE, dtype=np.uint64)
+        powers[:1] = 1
+        powers = np.cumprod(powers)
+        terms = (activities + 1).astype(np.uint64) * powers[positions]
+        hashes = np.add.reduceat(terms, starts) if len(starts) else terms
+        hashes ^= lengths.astype(np.uint64)
+
+        _, first_cases, groups = np.unique(
+            hashes, return_index=True, return_inverse=True
+        )
+        groups = groups.reshape(-1)
+        # compare every case with the first case that has the same hash
+        representatives = first_cases[groups]
+        collision = (lengths != lengths[representatives]).any()
+        if not collision:
+            reference = np.repeat(starts[representatives], lengths) + positions
+            collision = (activities != activities[reference]).any()
+        if collision:
+            keys = {}
+            groups = np.fromiter(
+                (
+                    keys.setdefault(activities[start:end].tobytes(), len(keys))
+                    for start, end in zip(starts, ends)
+                ),
+                dtype=np.int64,
+                count=len(starts),
+            )
+            first_cases = np.unique(groups, return_index=True)[1]
+
+        # number the variants in the order of their first case
+        variant_order = np.argsort(first_cases, kind="stable")
+        ranks = np.empty_like(variant_order)
+        ranks[variant_order] = np.arange(len(variant_order))
+        case_variants = ranks[groups]
+        variant_starts = starts[first_cases[variant_order]]
+        variant_lengths = lengths[first_cases[variant_order]]
+        offsets = np.zeros(len(variant_starts) + 1, dtype=np.int64)
+        np.cumsum(variant_lengths, out=offsets[1:])
+        codes = activities[
+            np.repeat(variant_starts - offsets[:-1], variant_lengths)
+            + np.arange(offsets[-1])
+        ]
+        return VariantIndex(
+            case_variants=case_variants,
+            case_ids=case_labels[cases[starts]],
+            case_durations=timestamps[ends - 1] - timestamps[starts],
+            codes=codes,
+            offsets=offsets,
+            counts=np.bincount(case_variants, minlength=len(variant_starts)),
+        )
+
+    def _variant_labels(self) -> list[tuple[str, ...]]:
+        if self._variant_labels_ is None:
+            _, labels = self._codes(EventType)
+            index = self.variant_index
+            self._variant_labels_ = [
+                tuple(labels[index.codes[index.offsets[i] : index.offsets[i + 1]]])
+                for i in range(len(index))
+            ]
+        return self._variant_labels_
 
     @property
     def trace_variants(self):
         if self._trace_variants is not None:
             return self._trace_variants
-        cases = self.events[self.schema.get_event_column(CaseID)].to_numpy()
-        activities = self.events[self.schema.get_event_column(EventType)].to_numpy()
-
-        c_unq, c_ind, c_counts = np.unique(cases, return_index=True, return_counts=True)
-        variants = dict()
-
-        for i in range(len(c_ind)):
-            si = c_ind[i]
-            ei = si + c_counts[i]
-            acts = tuple(activities[si:ei])
-            if acts not in variants:
-                variants[acts] = [c_unq[i]]
-            else:
-                variants[acts].append(c_unq[i])
-        self._trace_variants = variants
-        return variants
+        index = self.variant_index
+        self._trace_variants = {
+            variant: index.case_ids[cases].tolist()
+            for variant, cases in zip(self._variant_labels(), index.variant_cases())
+        }
+        return self._trace_variants
 
     @property
     def trace_variant_durations(self):
         if self._trace_variant_durations is not None:
             return self._trace_variant_durations
-        cases = self.events[self.schema.get_event_column(CaseID)].to_numpy()
-        activities = self.events[self.schema.get_event_column(EventType)].to_numpy()
-        timestamps = self.events[self.schema.get_event_column(EventTime)].to_numpy()
-
-        c_unq, c_ind, c_counts = np.unique(cases, return_index=True, return_counts=True)
-        variants = dict()
-
-        for i in range(len(c_ind)):
-            si = c_ind[i]
-            ei = si + c_counts[i]
-            acts = tuple(activities[si:ei])
-            if acts not in variants:
-                # add duration in seconds
-                variants[acts] = [int(timestamps[ei - 1] - timestamps[si])]
-            else:
-                variants[acts].append(int(timestamps[ei - 1] - timestamps[si]))
-        self._trace_variant_durations = variants
-        return variants
+        index = self.variant_index
+        # durations in nanoseconds
+        self._trace_variant_durations = {
+            variant: index.case_durations[cases].tolist()
+            for variant, cases in zip(self._variant_labels(), index.variant_cases())
+        }
+        return self._trace_variant_durations
 
     def get_inter_activity_duration(self, case_id, a, b):
-        this_case = self.events[
-            self.events[self.schema.get_event_column(CaseID)] == case_id
-        ][self.schema.get_event_column(CaseID)].to_numpy()
-        activities = self.events[
-            self.events[self.schema.get_event_column(CaseID)] == case_id
-        ][self.schema.get_event_column(EventType)].to_numpy()
-        timestamps = self.events[
-            self.events[self.schema.get_event_column(CaseID)] == case_id
-        ][self.schema.get_event_column(EventTime)].to_numpy()
-        c_unq, c_ind, c_counts = np.unique(
-            this_case, return_index=True, return_counts=True
-        )
-        if len(c_ind) == 0:
-            print(f"Case {case_id} not found. {len(c_ind)}")
+        code = self._case_codes([case_id])[0]
+        if code < 0:
+            _logger.warning("Case %s not found, its duration is 0", case_id)
             return 0
-        si = c_ind[0]
-        ei = si + c_counts[0]
-        acts = tuple(activities[si:ei])
-        # get index of activity a
-        a_ind = [i for i, act in enumerate(acts) if act == a]
-        # get index of activity b
-        b_ind = [i for i, act in enumerate(acts) if act == b]
-        # check if both activities are in the trace
-        if len(a_ind) > 0 and len(b_ind) > 0:
-            # get the first index of activity a
-            a_ind = a_ind[0]
-            # get the first index of activity b
-            b_ind = b_ind[0]
-            # check if activity b is after activity a
-            if a_ind < b_ind:
-                # get duration
-                return int(timestamps[si + b_ind] - timestamps[si + a_ind])
-            else:
-                return int(timestamps[si + a_ind] - timestamps[si + b_ind])
+        duration = self.inter_activity_durations([case_id], a, b).iloc[0]
+        if not pd.isna(duration):
+            return int(duration)
+
+    def inter_activity_durations(self, case_ids, a, b) -> pd.Series:
+        """
+        Return, for each of the given cases, the time in nanoseconds between the first
+        occurrences of activities `a` and `b`. The durations are missing for cases that
+        do not contain both activities and for unknown cases.
+
+        Returns:
+            pd.Series: The durations (with dtype `Int64`) indexed by the case IDs.
+        """
+        codes = self._case_codes(case_ids)
+        known = codes >= 0
+        offsets = self.case_offsets
+        starts = np.where(known, offsets[np.maximum(codes, 0)], 0)
+        lengths = np.where(known, offsets[np.maximum(codes, 0) + 1], 0) - starts
+        owners = np.repeat(np.arange(len(codes)), lengths)
+        # positions of the events of all cases, one case after the other
+        block_starts = np.cumsum(lengths) - lengths
+        events = np.repeat(starts - block_starts, lengths) + np.arange(lengths.sum())
+
+        activities, labels = self._codes(EventType)
+        times = self._event_times()
+        first = {}
+        for activity in (a, b):
+            code = pd.Index(labels).get_indexer([activity])[0]
+            matches = activities[events] == code
+            first[activity] = np.full(len(codes), len(times), dtype=np.int64)
+            np.minimum.at(first[activity], owners[matches], events[matches])
+
+        found = (first[a] < len(times)) & (first[b] < len(times))
+        durations = np.zeros(len(codes), dtype=np.int64)
+        durations[found] = np.abs(times[first[b][found]] - times[first[a][found]])
+        return pd.Series(
+            pd.arrays.IntegerArray(durations, ~found), index=case_ids, dtype="Int64"
+        )
 
     def activity_pair_durations(self, a, b):
-        cases = self.events[self.schema.get_event_column(CaseID)].to_numpy()
-        activities = self.events[self.schema.get_event_column(EventType)].to_numpy()
-        timestamps = self.events[self.schema.get_event_column(EventTime)].to_numpy()
-
-        c_unq, c_ind, c_counts = np.unique(cases, return_index=True, return_counts=True)
-        durations = []
-
-        for i in range(len(c_ind)):
-            si = c_ind[i]
-            ei = si + c_counts[i]
-            acts = tuple(activities[si:ei])
-            # get index of activity a
-            a_ind = [i for i, act in enumerate(acts) if act == a]
-            # get index of activity b
-            b_ind = [i for i, act in enumerate(acts) if act == b]
-            # check if both activities are in the trace
-            if len(a_ind) > 0 and len(b_ind) > 0:
-                # get the first index of activity a
-                a_ind = a_ind[0]
-                # get the first index of activity b
-                b_ind = b_ind[0]
-                # check if activity b is after activity a
-                if a_ind < b_ind:
-                    # add duration in seconds
-                    durations.append(
-                        int(timestamps[si + b_ind] - timestamps[si + a_ind])
-                    )
-                else:
-                    durations.append(
-                        int(timestamps[si + a_ind] - timestamps[si + b_ind])
-                    )
-        return durations
+        """
+        Return the time in nanoseconds between the first occurrences of `a` and `b` for
+        every case that contains both, in the order of the case IDs.
+        """
+        return self.activity_pairs_durations([(a, b)])["duration"].tolist()
+
+    def first_occurrences(self) -> np.ndarray:
+        """
+        Return the matrix of the positions in `events` of the first occurrence of every
+        activity (columns, by code) in every case (rows, by code), or -1 if the activity
+        does not occur in the case.
+        """
+        if self._first_occurrences is not None:
+            return self._first_occurrences
+        cases, case_labels = self._codes(CaseID)
+        activities, labels = self._codes(EventType)
+        valid = (cases >= 0) & (activities >= 0)
+        cells = cases[valid].astype(np.int64) * len(labels) + activities[valid]
+        # the events are sorted by time within each case
+        unique_cells, first_events = np.unique(cells, return_index=True)
+        first = np.full(len(case_labels) * len(labels), -1, dtype=np.int64)
+        first[unique_cells] = np.flatnonzero(valid)[first_events]
+        self._first_occurrences = first.reshape(len(case_labels), len(labels))
+        return self._first_occurrences
+
+    def _case_labels(self) -> np.ndarray:
+        """Return the case IDs of the rows of `first_occurrences`."""
+        return self._codes(CaseID)[1]
+
+    def _pair_durations(
+        self, pairs: list[tuple[str, str]], max_cells: int = 10_000_000
+    ) -> Iterator[tuple[int, np.ndarray, np.ndarray]]:
+        """
+        Yield, for each pair in order, its index, the codes of the cases that contain
+        both activities and the durations in nanoseconds between their first
+        occurrences. The pairs are processed in chunks of at most `max_cells` case-pair
+        cells.
+        """
+        first = self.first_occurrences()
+        times = self._event_times()
+        categories = pd.Index(self._codes(EventType)[1])
+        a_codes = categories.get_indexer([a for a, _ in pairs])
+        b_codes = categories.get_indexer([b for _, b in pairs])
+        # unknown activities occur in no case
+        first = np.hstack([first, np.full((len(first), 1), -1, dtype=first.dtype)])
+        a_codes[a_codes < 0] = first.shape[1] - 1
+        b_codes[b_codes < 0] = first.shape[1] - 1
+
+        chunk_size = max(1, max_cells // max(1, len(first)))
+        for chunk in range(0, len(pairs), chunk_size):
+            first_a = first[:, a_codes[chunk : chunk + chunk_size]]
+            first_b = first[:, b_codes[chunk : chunk + chunk_size]]
+            found = (first_a >= 0) & (first_b >= 0)
+            for j in range(found.shape[1]):
+                cases = np.flatnonzero(found[:, j])
+                durations = np.abs(times[first_b[cases, j]] - times[first_a[cases, j]])
+                yield chunk + j, cases, durations
+
+    def activity_pairs_durations(self, pairs: list[tuple[str, str]]) -> pd.DataFrame:
+        """
+        Compute `activity_pair_durations` for many activity pairs at once.
+
+        Returns:
+            pd.DataFrame: One row per pair and case that contains both activities, with
+            the columns `a`, `b`, `case` (the case ID) and `duration` (in nanoseconds).
+        """
+        case_labels = self._case_labels()
+        pair_ids, cases, durations = [], [], []
+        for i, pair_cases, pair_durations in self._pair_durations(pairs):
+            pair_ids.append(np.full(len(pair_cases), i))
+            cases.append(pair_cases)
+            durations.append(pair_durations)
+        pair_ids = np.concatenate(pair_ids) if pairs else np.zeros(0, dtype=int)
+        cases = np.concatenate(cases) if pairs else np.zeros(0, dtype=int)
+        return pd.DataFrame(
+            {
+                "a": np.array([a for a, _ in pairs], dtype=object)[pair_ids],
+                "b": np.array([b for _, b in pairs], dtype=object)[pair_ids],
+                "case": case_labels[cases],
+                "duration": (
+                    np.concatenate(durations) if pairs else np.zeros(0, dtype=np.int64)
+                ),
+            }
+        )
+
+    def activity_pairs_duration_summary(
+        self,
+        pairs: list[tuple[str, str]],
+        percentiles: Iterable[float] = (25, 50, 75),
+        bins: Union[int, np.ndarray] = None,
+    ) -> pd.DataFrame:
+        """
+        Summarize the durations of `activity_pairs_durations` per pair without returning
+        every duration.
+
+        Args:
+            pairs (list[tuple[str, str]]): The activity pairs.
+            percentiles (Iterable[float]): Percentiles (between 0 and 100) of the
+                durations to compute.
+            bins (Union[int, np.ndarray]): If given, a histogram of the durations is
+                computed for each pair with these bins (see `np.histogram`).
+
+        Returns:
+            pd.DataFrame: One row per pair with the columns `a`, `b`, `count`, `mean`,
+            one column `p<q>` per percentile and, with `bins`, the columns `histogram`
+            and `bin_edges`. The durations are in nanoseconds.
+        """
+        percentiles = list(percentiles)
+        rows = []
+        for i, _, durations in self._pair_durations(pairs):
+            row = {"a": pairs[i][0], "b": pairs[i][1], "count": len(durations)}
+            row["mean"] = durations.mean() if len(durations) > 0 else np.nan
+            values = (
+                np.percentile(durations, percentiles)
+                if len(durations) > 0
+                else np.full(len(percentiles), np.nan)
+            )
+            row.update({f"p{q:g}": value for q, value in zip(percentiles, values)})
+            if bins is not None:
+                row["histogram"], row["bin_edges"] = np.histogram(durations, bins=bins)
+            rows.append(row)
+        return pd.DataFrame(rows)
 
     def get_avg_duration(self) -> float:
         # group events by case id then get the difference between the first and last timestamp of each case, finally get the mean and return it as a float in seconds
-        return (
-            self.events.groupby(self.schema.get_event_column(CaseID))[
-                self.schema.get_event_column(EventTime)
-            ]
-            .apply(lambda x: x.max() - x.min())
-            .mean()
-            .total_seconds()
-        )
+        if self._avg_duration is None:
+            self._avg_duration = (
+                self.events.groupby(self._event_column(CaseID), observed=True)[
+                    self._event_column(EventTime)
+                ]
+                .apply(lambda x: x.max() - x.min())
+                .mean()
+                .total_seconds()
+            )
+        return self._avg_duration
 
 
 class _EventLogIterator(Iterator):
@@ -549,6 +1108,171 @@ class _EventLogIterator(Iterator):
             raise StopIteration
 
 
+class EventLogView(EventLog):
+    """
+    A sub-log that selects some cases of a parent `EventLog` without copying its data.
+
+    The view shares the events, the categorical codes and the variant index of the
+    parent. Positions of events, e.g. in `case_offsets` and `first_occurrences`, refer to
+    the events of the parent. The `cases` and `events` frames of the view are only built
+    when they are accessed.
+
+    Args:
+        parent (EventLog): The log to select cases from. A view of a view selects from
+            the underlying log.
+        case_rows (np.ndarray): The rows of the selected cases in `parent.cases`.
+    """
+
+    def __init__(self, parent: EventLog, case_rows: np.ndarray):
+        case_rows = np.sort(np.asarray(case_rows, dtype=np.int64))
+        if isinstance(parent, EventLogView):
+            case_rows = parent.case_rows[case_rows]
+            parent = parent.parent
+        self.parent = parent
+        self.schema = parent.schema
+        self.case_rows = case_rows
+        self.invalidate_caches()
+
+    def invalidate_caches(self):
+        """
+        Drop all data derived from the selected cases, including the `cases` and
+        `events` frames, and look up the events of the selected cases in the parent
+        again. The parent does not notify its views, so call this after
+        `invalidate_caches` of the parent. `case_rows` keeps referring to the same rows
+        of `parent.cases`.
+        """
+        self._clear_caches()
+        self._cases = None
+        self._events = None
+        # codes of the selected cases with events, in the order of their case IDs
+        parent = self.parent
+        codes = parent._case_codes(parent.case_positions[self.case_rows])
+        self.case_codes = np.unique(codes[codes >= 0])
+        self._selected = np.zeros(len(parent.case_offsets) - 1, dtype=bool)
+        self._selected[self.case_codes] = True
+
+    @property
+    def cases(self) -> pd.DataFrame:
+        if self._cases is None:
+            self._cases = self.parent.cases.iloc[self.case_rows]
+        return self._cases
+
+    @property
+    def events(self) -> pd.DataFrame:
+        if self._events is None:
+            offsets = self.parent.case_offsets
+            starts = offsets[self.case_codes]
+            lengths = offsets[self.case_codes + 1] - starts
+            self._events = self.parent.events.iloc[_concatenate_ranges(starts, lengths)]
+        return self._events
+
+    def __len__(self):
+        return len(self.case_rows)
+
+    def save(self, path: Union[str, os.PathLike]):
+        """Save the selected cases as an event log of their own."""
+        EventLog(self.cases.copy(), self.events.copy(), self.schema).save(path)
+
+    def __repr__(self):
+        return (
+            f"EventLogView(\n    parent = (EventLog with {len(self.parent)} cases),\n    "
+            f"cases = ({len(self)} cases)\n)"
+        )
+
+    def _codes(self, C: type[ColumnType]) -> tuple[np.ndarray, np.ndarray]:
+        return self.parent._codes(C)
+
+    def _event_times(self) -> np.ndarray:
+        return self.parent._event_times()
+
+    @property
+    def case_offsets(self) -> np.ndarray:
+        return self.parent.case_offsets
+
+    @property
+    def case_positions(self) -> pd.Index:
+        if self._case_positions is None:
+            self._case_positions = self.parent.case_positions[self.case_rows]
+        return self._case_positions
+
+    def _case_codes(self, case_ids) -> np.ndarray:
+        codes = self.parent._case_codes(case_ids)
+        codes[~self._selected[np.maximum(codes, 0)]] = -1
+        return codes
+
+    def _case(self, position: int) -> Case:
+        return self.parent._case(self.case_rows[position])
+
+    def _source(self) -> tuple[EventLog, np.ndarray]:
+        return self.parent, self.case_rows
+
+    def _case_labels(self) -> np.ndarray:
+        return self.parent._case_labels()[self.case_codes]
+
+    def unique_activities(self):
+        if self._unique_activities is None:
+            # the variants are ordered by their first case, so the activities of the
+            # variants appear in the same order as in the events
+            _, labels = self._codes(EventType)
+            codes = pd.unique(self.variant_index.codes)
+            self._unique_activities = labels[codes].tolist()
+        return self._unique_activities
+
+    def activity_counts(self) -> dict[str, int]:
+        if self._activity_counts is None:
+            _, labels = self._codes(EventType)
+            index = self.variant_index
+            counts = np.bincount(
+                index.codes,
+                weights=np.repeat(index.counts, np.diff(index.offsets)),
+                minlength=len(labels),
+            ).astype(np.int64)
+            # ties are ordered by first appearance, like the categories of a new log
+            codes = pd.unique(index.codes)
+            self._activity_counts = (
+                pd.Series(counts[codes], index=labels[codes])
+                .sort_values(ascending=False, kind="stable")
+                .to_dict()
+            )
+        return self._activity_counts
+
+    @property
+    def variant_index(self) -> VariantIndex:
+        if self._variant_index is None:
+            index = self.parent.variant_index
+            variants, first_cases, case_variants = np.unique(
+                index.case_variants[self.case_codes],
+                return_index=True,
+                return_inverse=True,
+            )
+            # number the variants in the order of their first case, as in the parent
+            variant_order = np.argsort(first_cases, kind="stable")
+            ranks = np.empty_like(variant_order)
+            ranks[variant_order] = np.arange(len(variant_order))
+            variants = variants[variant_order]
+            starts = index.offsets[variants]
+            lengths = index.offsets[variants + 1] - starts
+            offsets = np.zeros(len(variants) + 1, dtype=np.int64)
+            np.cumsum(lengths, out=offsets[1:])
+            case_variants = ranks[case_variants.reshape(-1)]
+            self._variant_index = VariantIndex(
+                case_variants=case_variants,
+                case_ids=index.case_ids[self.case_codes],
+                case_durations=index.case_durations[self.case_codes],
+                codes=index.codes[
+                    np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
+                ],
+                offsets=offsets,
+                counts=np.bincount(case_variants, minlength=len(variants)),
+            )
+        return self._variant_index
+
+    def first_occurrences(self) -> np.ndarray:
+        if self._first_occurrences is None:
+            self._first_occurrences = self.parent.first_occurrences()[self.case_codes]
+        return self._first_occurrences
+
+
 def split_on_case_attribute(self, attribute: str) -> dict[str, EventLog]:
     """
     Split the event log on a case attribute.
@@ -558,20 +1282,7 @@ def split_on_case_attribute(self, attribute: str) -> dict[str, EventLog]:
 
     Returns:
         dict[str, EventLog]: A dictionary mapping the unique values of the case attribute
-        to the corresponding event logs.
+        to views (see `EventLogView`) of the corresponding cases.
     """
-    unique_values = self.cases[attribute].unique()
-    split_logs = {}
-    for value in unique_values:
-        mask = self.cases[attribute] == value
-        cases = self.cases[mask]
-        case_ids = cases[self.schema.get_case_column(CaseID)].values
-        events = self.events.loc[
-            self.events[self.schema.get_event_column(CaseID)].isin(case_ids)
-        ]
-        split_logs[value] = EventLog(
-            cases=cases.copy(deep=True),
-            events=events.copy(deep=True),
-            schema=self.schema,
-        )
-    return split_logs
+    groups = self.cases.groupby(attribute, sort=False).indices
+    return {value: EventLogView(self, rows) for value, rows in groups.items()}
@@ -0,0 +1,155 @@
+from dataclasses import dataclass
+from typing import Iterable
+
+import numpy as np
+
+
+@dataclass
+class VariantEncoding:
+    """
+    Integer encoding of trace variants.
+
+    Every activity is identified by its position in `activities`. The variants are
+    stored back to back in one `int32` buffer `codes`; variant `i` occupies
+    `codes[offsets[i]:offsets[i + 1]]`. The memory needed is proportional to the
+    number of events in the variants plus the number of activities.
+    """
+
+    activities: list[str]
+    codes: np.ndarray
+    offsets: np.ndarray
+
+    @classmethod
+    def from_variants(
+        cls, variants: Iterable[tuple[str, ...]], activity_ids: dict[str, int]
+    ) -> "VariantEncoding":
+        """
+        Encode variants given as tuples of activity labels using the mapping
+        `activity_ids` from activity label to ID.
+        """
+        variants = list(variants)
+        lengths = np.fromiter(map(len, variants), dtype=np.int64, count=len(variants))
+        offsets = np.zeros(len(variants) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        codes = np.fromiter(
+            (activity_ids[activity] for variant in variants for activity in variant),
+            dtype=np.int32,
+            count=offsets[-1],
+        )
+        activities = [None] * len(activity_ids)
+        for activity, i in activity_ids.items():
+            activities[i] = activity
+        return cls(activities=activities, codes=codes, offsets=offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> np.ndarray:
+        return self.codes[self.offsets[i] : self.offsets[i + 1]]
+
+    @property
+    def num_activities(self) -> int:
+        return len(self.activities)
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def decode(self, i: int) -> tuple[str, ...]:
+        return tuple(self.activities[code] for code in self[i])
+
+    def occurrence_index(self) -> "OccurrenceIndex":
+        """
+        Compute the variants x activities occurrence index of the encoding.
+        """
+        lengths = self.lengths
+        num_variants = len(lengths)
+        variant_ids = np.repeat(np.arange(num_variants, dtype=np.int64), lengths)
+        positions = np.arange(len(self.codes), dtype=np.int64) - np.repeat(
+            self.offsets[:-1], lengths
+        )
+        cells = variant_ids * self.num_activities + self.codes
+
+        shape = (num_variants, self.num_activities)
+        counts = np.zeros(num_variants * self.num_activities, dtype=np.int32)
+        first = np.full(num_variants * self.num_activities, -1, dtype=np.int32)
+        last = np.full(num_variants * self.num_activities, -1, dtype=np.int32)
+        unique_cells, first_event, cell_counts = np.unique(
+            cells, return_index=True, return_counts=True
+        )
+        counts[unique_cells] = cell_counts
+        first[unique_cells] = positions[first_event]
+        # The last occurrence of a cell is the first one in the reversed events
+        _, last_event = np.unique(cells[::-1], return_index=True)
+        last[unique_cells] = positions[len(cells) - 1 - last_event]
+        return OccurrenceIndex(
+            counts=counts.reshape(shape),
+            first=first.reshape(shape),
+            last=last.reshape(shape),
+            lengths=lengths,
+        )
+
+
+@dataclass
+class OccurrenceIndex:
+    """
+    Occurrence statistics of every activity in every variant of a `VariantEncoding`.
+
+    All matrices have shape (number of variants, number of activities). `first` and
+    `last` hold the positions of the first and last occurrence, or -1 if the activity
+    does not occur in the variant.
+    """
+
+    counts: np.ndarray
+    first: np.ndarray
+    last: np.ndarray
+    lengths: np.ndarray
+
+    def count(self, activity_ids: list[int]) -> np.ndarray:
+        return self.counts[:, activity_ids].sum(axis=1)
+
+    def occurs(self, activity_ids: list[int]) -> np.ndarray:
+        return (self.counts[:, activity_ids] > 0).any(axis=1)
+
+    def starts_with(self, activity_ids: list[int]) -> np.ndarray:
+        return (self.first[:, activity_ids] == 0).any(axis=1)
+
+    def ends_with(self, activity_ids: list[int]) -> np.ndarray:
+        last = self.last[:, activity_ids]
+        return ((last >= 0) & (last == self.lengths[:, None] - 1)).any(axis=1)
+
+
+@dataclass
+class VariantCases:
+    """
+    The cases of each trace variant in compressed sparse row format: the IDs of the
+    cases of variant `i` are `case_ids[offsets[i]:offsets[i + 1]]`.
+    """
+
+    case_ids: np.ndarray
+    offsets: np.ndarray
+
+    @classmethod
+    def from_case_lists(cls, case_lists: Iterable[list[str]]) -> "VariantCases":
+        case_lists = list(case_lists)
+        lengths = np.fromiter(
+            map(len, case_lists), dtype=np.int64, count=len(case_lists)
+        )
+        offsets = np.zeros(len(case_lists) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        case_ids = np.empty(offsets[-1], dtype=object)
+        case_ids[:] = [case_id for case_list in case_lists for case_id in case_list]
+        return cls(case_ids=case_ids, offsets=offsets)
+
+    def gather(self, variants: np.ndarray) -> np.ndarray:
+        """
+        Return the positions in `case_ids` of the cases of the given variants (a boolean
+        mask or an array of indices), in the order of the variants.
+        """
+        if variants.dtype == bool:
+            variants = np.flatnonzero(variants)
+        starts = self.offsets[variants]
+        lengths = self.offsets[variants + 1] - starts
+        # position of every case relative to the start of its variant's block
+        block_starts = np.cumsum(lengths) - lengths
+        return np.repeat(starts - block_starts, lengths) + np.arange(lengths.sum())
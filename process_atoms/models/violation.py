@@ -1,12 +1,50 @@
-from pydantic import BaseModel
+import numpy as np
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    PrivateAttr,
+    computed_field,
+    model_validator,
+)
 
 from process_atoms.models.processatom import ProcessAtom
 
 
 class Violation(BaseModel):
+    """
+    The cases of a log that violate an atom.
+
+    The violating cases are kept as positions `case_indices` in the array `case_ids`,
+    which is shared by all violations of a check. The list of case IDs `cases` is only
+    built when it is accessed. A violation can also be created from a list `cases`.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     id: str
     log: str
     atom: ProcessAtom
-    cases: list[str]
+    case_indices: np.ndarray = Field(exclude=True, repr=False)
+    case_ids: np.ndarray = Field(exclude=True, repr=False)
     frequency: int
     attributes: dict
+    _cases: list[str] = PrivateAttr(default=None)
+
+    @model_validator(mode="before")
+    @classmethod
+    def index_cases(cls, data):
+        if isinstance(data, dict) and "cases" in data:
+            data = dict(data)
+            cases = data.pop("cases")
+            data["case_ids"] = np.empty(len(cases), dtype=object)
+            data["case_ids"][:] = cases
+            data["case_indices"] = np.arange(len(cases))
+        return data
+
+    @computed_field
+    @property
+    def cases(self) -> list[str]:
+        if self._cases is None:
+            self._cases = self.case_ids[self.case_indices].tolist()
+        return self._cases
@@ -1,4 +1,7 @@
 import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 from typing import Callable, List
 
 from process_atoms.match.matcher import Matcher
@@ -13,6 +16,16 @@ from process_atoms.models.violation import Violation
 from process_atoms.signalquerybuilder import SignalQueryBuilder
 from process_atoms.utils import aggregate_process_atoms
 
+# State shared with the worker processes of `mine_behavioral_differences_from_log`. It
+# is set before the workers are forked, so they inherit the sub-logs instead of
+# receiving a pickled copy.
+_shared_contexts = None
+
+
+def _mine_context(position: int) -> List[ProcessAtom]:
+    process_atoms, sub_logs, kwargs = _shared_contexts
+    return process_atoms.mine_atoms_from_log(log=sub_logs[position], **kwargs)
+
 
 class ProcessAtoms:
     def __init__(self):
@@ -116,22 +129,84 @@ class ProcessAtoms:
         local=False,
         d4py=False,
         consider_vacuity=True,
+        n_jobs: int = None,
+        shared_candidates=False,
     ):
-        print(log.schema[context_attribute])
+        """
+        Mines process atoms from each context, i.e., the cases with the same value of
+        a case attribute.
+
+        Args:
+            process_id (str): The ID of the process.
+            log: The EventLog abstraction from PINT.
+            context_attribute (str): The case attribute that defines the contexts.
+            considered_templates: Templates to consider during mining (optional).
+            n_jobs (int): Number of worker processes that mine the contexts, largest
+                context first. By default, the contexts are mined in the calling
+                process; -1 uses all CPUs.
+            shared_candidates (bool): Whether to evaluate the candidates of all contexts
+                once on the complete log and aggregate their support and confidence
+                per context (see `RegexChecker.run_per_context`) instead of mining each
+                context separately. The atoms are the same as without shared
+                candidates. Not supported for local mining with d4py.
+
+        Returns:
+            dict: The mined process atoms of each context.
+        """
         sub_logs = split_on_case_attribute(log, context_attribute)
-        context_to_atoms = {}
-        for sub_log in sub_logs:
-            atoms = self.mine_atoms_from_log(
-                process_id=process_id,
-                log=sub_log,
-                considered_templates=considered_templates,
+        if shared_candidates:
+            if local and d4py:
+                raise ValueError("Shared candidates are not supported with d4py")
+            context_to_atoms = RegexChecker(process_id, log).run_per_context(
+                sub_logs,
+                considered_templates,
                 min_support=min_support,
-                local=local,
-                d4py=d4py,
                 consider_vacuity=consider_vacuity,
             )
-            context_to_atoms[sub_log.schema[context_attribute]] = atoms
-        return context_to_atoms
+            return {
+                context: aggregate_process_atoms(atoms)
+                for context, atoms in context_to_atoms.items()
+            }
+
+        kwargs = dict(
+            process_id=process_id,
+            considered_templates=considered_templates,
+            min_support=min_support,
+            local=local,
+            d4py=d4py,
+            consider_vacuity=consider_vacuity,
+        )
+        contexts = list(sub_logs.keys())
+        if n_jobs is not None and n_jobs < 0:
+            n_jobs = os.cpu_count()
+        if (
+            n_jobs is None
+            or n_jobs <= 1
+            or len(contexts) <= 1
+            or "fork" not in multiprocessing.get_all_start_methods()
+        ):
+            return {
+                context: self.mine_atoms_from_log(log=sub_logs[context], **kwargs)
+                for context in contexts
+            }
+
+        global _shared_contexts
+        _shared_contexts = (self, list(sub_logs.values()), kwargs)
+        # the largest contexts are submitted first so that they do not finish last
+        positions = sorted(
+            range(len(contexts)), key=lambda i: len(sub_logs[contexts[i]]), reverse=True
+        )
+        try:
+            with ProcessPoolExecutor(
+                max_workers=min(n_jobs, len(contexts)),
+                mp_context=multiprocessing.get_context("fork"),
+            ) as executor:
+                futures = {i: executor.submit(_mine_context, i) for i in positions}
+                return {
+                    context: futures[i].result() for i, context in enumerate(contexts)
+                }
+        finally:
+            _shared_contexts = None
 
     def aggregate_atoms(self, atoms: List[ProcessAtom]) -> List[ProcessAtom]:
         """